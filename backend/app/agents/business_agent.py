@@ -1,32 +1,45 @@
 from typing import List
 
+RISK_PARAMS = {
+    "decoding_method": "greedy",
+    "max_new_tokens": 2500,
+    "temperature": 0.8,
+    "stop_sequences": ["\n\n\n"]
+}
+
 class BusinessRiskAgent:
     def __init__(self, business_retriever, model):
         self.retriever = business_retriever
         self.model = model
 
     def analyze_business_impact(self, location: str, climate_analysis: str, user_query: str) -> str:
-        business_queries = [
+        return self.analyze(location, climate_analysis, user_query, self.retrieve(location))
+
+    # Retrieval needs only the location, so it can run before the climate analysis is ready
+    def retrieve(self, location: str) -> List:
+        all_docs = []
+        if self.retriever:
+            for docs in self.retriever.batch_invoke(self.retrieval_queries(location), k=2):
+                all_docs.extend(docs)
+        return all_docs
+
+    def retrieval_queries(self, location: str) -> List[str]:
+        return [
             f"supply chain risk climate business continuity {location}",
             f"operational resilience climate adaptation {location}",
             f"financial impact climate change business {location}",
             f"risk management climate hazards enterprise {location}"
         ]
-        all_docs = []
-        if self.retriever:
-            for q in business_queries:
-                docs = self.retriever.invoke(q)
-                all_docs.extend(docs[:2])
 
+    def analyze(self, location: str, climate_analysis: str, user_query: str, all_docs: List) -> str:
+        context = self._build_business_context(all_docs)
+        prompt = self._build_risk_prompt(location, climate_analysis, user_query, context)
+        return self.model.generate_text(prompt=prompt, params=RISK_PARAMS).strip()
+
+    async def aanalyze(self, location: str, climate_analysis: str, user_query: str, all_docs: List) -> str:
         context = self._build_business_context(all_docs)
         prompt = self._build_risk_prompt(location, climate_analysis, user_query, context)
-        enhanced_params = {
-            "decoding_method": "greedy",
-            "max_new_tokens": 2500,
-            "temperature": 0.8,
-            "stop_sequences": ["\n\n\n"]
-        }
-        return self.model.generate_text(prompt=prompt, params=enhanced_params).strip()
+        return (await self.model.agenerate_text(prompt=prompt, params=RISK_PARAMS)).strip()
 
     def _build_business_context(self, docs: List) -> str:
         if not docs:
@@ -34,6 +47,8 @@ class BusinessRiskAgent:
         parts = ["--- BUSINESS RISK DOCUMENTS ---"]
         for i, doc in enumerate(docs[:8], 1):
             source = doc.metadata.get("source", f"Source {i}")
+            if doc.metadata.get("page"):
+                source = f"{source}, p. {doc.metadata['page']}"
             content = doc.page_content[:600] + "..."
             parts.append(f"\nDocument {i}: {source}\nContent: {content}")
         return "\n".join(parts)
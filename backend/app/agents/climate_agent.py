@@ -1,5 +1,12 @@
 from typing import Dict, List
 
+ANALYSIS_PARAMS = {
+    "decoding_method": "greedy",
+    "max_new_tokens": 2000,
+    "temperature": 0.8,
+    "stop_sequences": ["\n\n\n"]
+}
+
 class ClimateAgent:
     def __init__(self, climate_retriever, serper_service, model):
         self.retriever = climate_retriever
@@ -7,42 +14,49 @@ class ClimateAgent:
         self.model = model
 
     def analyze_climate_risks(self, location: str, user_query: str) -> Dict:
-        search_results = {
-            "weather": self.serper.search_climate_data(location, "weather"),
-            "risks": self.serper.search_climate_data(location, "risks"),
-            "news": self.serper.search_climate_data(location, "news"),
-            "projections": self.serper.search_climate_data(location, "projections")
-        }
+        return self.analyze(location, user_query, self.search(location), self.retrieve(location))
+
+    # search() and retrieve() depend only on the location, so the orchestrator can
+    # run them concurrently with each other and with the business retrieval
+    def search(self, location: str) -> Dict:
+        return self.serper.search_many(
+            location, ["weather", "risks", "news", "projections"]
+        )
+
+    def retrieve(self, location: str) -> List:
+        all_docs = []
+        if self.retriever:
+            for docs in self.retriever.batch_invoke(self.retrieval_queries(location), k=2):
+                all_docs.extend(docs)
+        return all_docs
 
-        climate_queries = [
+    def retrieval_queries(self, location: str) -> List[str]:
+        return [
             f"climate change impacts {location} temperature precipitation extreme weather",
             f"sea level rise flooding {location} coastal risks",
             f"drought water scarcity {location} agriculture",
             f"extreme heat heatwave {location} infrastructure"
         ]
-        all_docs = []
-        if self.retriever:
-            for q in climate_queries:
-                docs = self.retriever.invoke(q)
-                all_docs.extend(docs[:2])
 
+    def analyze(self, location: str, user_query: str, search_results: Dict, all_docs: List) -> Dict:
         context = self._build_context(search_results, all_docs)
+        prompt = self._build_analysis_prompt(location, user_query, context)
+        analysis = self.model.generate_text(prompt=prompt, params=ANALYSIS_PARAMS).strip()
+        return self._result(location, analysis, search_results, all_docs)
 
+    async def aanalyze(self, location: str, user_query: str, search_results: Dict, all_docs: List) -> Dict:
+        context = self._build_context(search_results, all_docs)
         prompt = self._build_analysis_prompt(location, user_query, context)
-        enhanced_params = {
-            "decoding_method": "greedy",
-            "max_new_tokens": 2000,
-            "temperature": 0.8,
-            "stop_sequences": ["\n\n\n"]
-        }
-        analysis = self.model.generate_text(prompt=prompt, params=enhanced_params).strip()
+        analysis = (await self.model.agenerate_text(prompt=prompt, params=ANALYSIS_PARAMS)).strip()
+        return self._result(location, analysis, search_results, all_docs)
 
+    def _result(self, location: str, analysis: str, search_results: Dict, all_docs: List) -> Dict:
         return {
             "analysis": analysis,
             "location": location,
             "search_data": search_results,
             "sources_used": len(all_docs),
-            "search_queries_used": len(climate_queries)
+            "search_queries_used": len(self.retrieval_queries(location))
         }
 
     def _build_context(self, search_results: Dict, local_docs: List) -> str:
@@ -68,6 +82,8 @@ class ClimateAgent:
             parts.append("\n--- LOCAL CLIMATE DATABASE ---")
             for doc in local_docs[:8]:
                 source = doc.metadata.get("source", "Unknown Source")
+                if doc.metadata.get("page"):
+                    source = f"{source}, p. {doc.metadata['page']}"
                 content = doc.page_content[:500] + "..."
                 parts.append(f"\nDocument: {source}\nContent: {content}")
         return "\n".join(parts)
@@ -0,0 +1,326 @@
+import asyncio
+import heapq
+import itertools
+import random
+import re
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional
+
+from ..settings.config import Config
+
+# Lower value is served first: short routing/location calls never queue behind
+# long analyses, analyses are admitted before final synthesis, and background
+# work (history summaries) only runs when no user-facing call is waiting
+ROUTING = 0
+ANALYSIS = 1
+SYNTHESIS = 2
+BACKGROUND = 3
+PRIORITY_NAMES = {ROUTING: "routing", ANALYSIS: "analysis", SYNTHESIS: "synthesis", BACKGROUND: "background"}
+
+# Throttling in an error message: an HTTP status of 429 (as in watsonx's
+# "Status code: 429") or the standard reason phrases, never a bare "429"
+# that could be part of a token count or request id
+_RATE_LIMITED_MESSAGE = re.compile(
+    r"\bstatus(?:[ _-]?code)?\W{0,3}429\b|too many requests|rate limit", re.IGNORECASE
+)
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_llm_scheduler() -> "LLMScheduler":
+    # One admission queue per process so every chatbot component shares the
+    # same rate limit and concurrency cap. The configured budget is for the whole
+    # deployment, so each of the WEB_WORKERS processes gets an equal share
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            workers = max(1, Config.WEB_WORKERS)
+            _scheduler = LLMScheduler(
+                max_concurrency=max(1, Config.LLM_MAX_CONCURRENCY // workers),
+                routing_slots=Config.LLM_ROUTING_SLOTS,
+                rate_per_second=Config.LLM_RATE_PER_SECOND / workers,
+                burst=max(1, Config.LLM_BURST // workers),
+                max_retries=Config.LLM_MAX_RETRIES,
+                backoff=Config.LLM_BACKOFF,
+                max_backoff=Config.LLM_MAX_BACKOFF
+            )
+        return _scheduler
+
+
+def is_rate_limited(error: Exception) -> bool:
+    # watsonx reports throttling as an ApiRequestFailure whose message carries the
+    # HTTP status; HTTP client errors expose status_code or response.status_code
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    if status is not None:
+        return status == 429
+    return _RATE_LIMITED_MESSAGE.search(str(error)) is not None
+
+
+class _Waiter:
+    __slots__ = ("priority", "wake", "enqueued", "granted", "reserved", "cancelled")
+
+    def __init__(self, priority: int, wake: Callable[[], None]):
+        self.priority = priority
+        self.wake = wake
+        self.enqueued = time.monotonic()
+        self.granted = False
+        self.reserved = False
+        self.cancelled = False
+
+
+class LLMScheduler:
+    # Admits LLM calls in priority order subject to a token bucket (requests per
+    # second, with burst) and a cap on calls in flight. A slot is held for the
+    # whole generation, including streams. Routing calls may also use
+    # routing_slots reserved slots, so a short routing call never waits for a
+    # long generation to finish. Calls failing with 429 give up their slot,
+    # back off with full jitter and queue again at the same priority.
+    def __init__(self, max_concurrency: int = 8, rate_per_second: float = 8.0, burst: int = 8,
+                 max_retries: int = 4, backoff: float = 0.5, max_backoff: float = 8.0,
+                 routing_slots: int = 1):
+        self.max_concurrency = max_concurrency
+        self.routing_slots = routing_slots
+        self.rate = rate_per_second
+        self.burst = burst
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+        self._lock = threading.Lock()
+        self._queue: List = []
+        self._seq = itertools.count()
+        self._tokens = float(burst)
+        self._refilled = time.monotonic()
+        self._in_flight = 0
+        self._routing_in_flight = 0
+        self._timer: Optional[threading.Timer] = None
+
+        self._granted = {p: 0 for p in PRIORITY_NAMES}
+        self._wait_seconds = {p: 0.0 for p in PRIORITY_NAMES}
+        self._max_wait = {p: 0.0 for p in PRIORITY_NAMES}
+        self._rate_limited = 0
+        self._retries_exhausted = 0
+
+    def bind(self, model, priority: int) -> "ScheduledModel":
+        return ScheduledModel(model, self, priority)
+
+    # --- admission ---------------------------------------------------------
+
+    def acquire(self, priority: int) -> bool:
+        # Returns whether a reserved routing slot was granted; pass it to release()
+        event = threading.Event()
+        waiter = _Waiter(priority, event.set)
+        self._enqueue(waiter)
+        event.wait()
+        return waiter.reserved
+
+    async def aacquire(self, priority: int) -> bool:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def wake():
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(None))
+
+        waiter = _Waiter(priority, wake)
+        self._enqueue(waiter)
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                waiter.cancelled = True
+                granted = waiter.granted
+            if granted:
+                self.release(waiter.reserved)
+            raise
+        return waiter.reserved
+
+    def release(self, reserved: bool = False) -> None:
+        with self._lock:
+            if reserved:
+                self._routing_in_flight -= 1
+            else:
+                self._in_flight -= 1
+            self._dispatch_locked()
+
+    def _enqueue(self, waiter: _Waiter) -> None:
+        with self._lock:
+            heapq.heappush(self._queue, (waiter.priority, next(self._seq), waiter))
+            self._dispatch_locked()
+
+    def _refill_locked(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(float(self.burst), self._tokens + (now - self._refilled) * self.rate)
+        self._refilled = now
+
+    def _dispatch_locked(self) -> None:
+        # The queue is ordered by priority, so routing waiters are always at the
+        # front: they take a shared slot if one is free, else a reserved one
+        self._refill_locked()
+        while self._queue:
+            waiter = self._queue[0][2]
+            if waiter.cancelled:
+                heapq.heappop(self._queue)
+                continue
+            shared = self._in_flight < self.max_concurrency
+            reserved = (not shared and waiter.priority == ROUTING
+                        and self._routing_in_flight < self.routing_slots)
+            if not shared and not reserved:
+                return
+            if self._tokens < 1.0:
+                self._schedule_refill_locked()
+                return
+            heapq.heappop(self._queue)
+            self._tokens -= 1.0
+            if reserved:
+                self._routing_in_flight += 1
+            else:
+                self._in_flight += 1
+            waiter.granted = True
+            waiter.reserved = reserved
+            waited = time.monotonic() - waiter.enqueued
+            self._granted[waiter.priority] += 1
+            self._wait_seconds[waiter.priority] += waited
+            self._max_wait[waiter.priority] = max(self._max_wait[waiter.priority], waited)
+            waiter.wake()
+
+    def _schedule_refill_locked(self) -> None:
+        # Wake the queue when the next token is due; one timer covers all waiters
+        if self._timer is not None:
+            return
+        delay = (1.0 - self._tokens) / self.rate if self.rate > 0 else 1.0
+
+        def fire():
+            with self._lock:
+                self._timer = None
+                self._dispatch_locked()
+
+        self._timer = threading.Timer(max(delay, 0.001), fire)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _throttled(self, attempt: int) -> float:
+        # A 429 means the shared quota is exhausted: empty the bucket so queued
+        # calls wait as well, and return this caller's jittered backoff
+        with self._lock:
+            self._rate_limited += 1
+            self._tokens = 0.0
+            self._refilled = time.monotonic()
+        return random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+
+    def _exhausted(self) -> None:
+        with self._lock:
+            self._retries_exhausted += 1
+
+    # --- execution ---------------------------------------------------------
+
+    def call(self, priority: int, fn: Callable, *args, **kwargs):
+        attempt = 0
+        while True:
+            reserved = self.acquire(priority)
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                if not is_rate_limited(e) or attempt >= self.max_retries:
+                    if is_rate_limited(e):
+                        self._exhausted()
+                    raise
+                delay = self._throttled(attempt)
+            finally:
+                self.release(reserved)
+            time.sleep(delay)
+            attempt += 1
+
+    async def acall(self, priority: int, fn: Callable, *args, **kwargs):
+        attempt = 0
+        while True:
+            reserved = await self.aacquire(priority)
+            try:
+                return await fn(*args, **kwargs)
+            except Exception as e:
+                if not is_rate_limited(e) or attempt >= self.max_retries:
+                    if is_rate_limited(e):
+                        self._exhausted()
+                    raise
+                delay = self._throttled(attempt)
+            finally:
+                self.release(reserved)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def stream(self, priority: int, fn: Callable, *args, **kwargs) -> Iterator[str]:
+        # Retries only while nothing has been yielded; a stream that fails midway
+        # cannot be replayed without duplicating output
+        attempt = 0
+        while True:
+            reserved = self.acquire(priority)
+            started = False
+            try:
+                for piece in fn(*args, **kwargs):
+                    started = True
+                    yield piece
+                return
+            except Exception as e:
+                if started or not is_rate_limited(e) or attempt >= self.max_retries:
+                    if is_rate_limited(e):
+                        self._exhausted()
+                    raise
+                delay = self._throttled(attempt)
+            finally:
+                self.release(reserved)
+            time.sleep(delay)
+            attempt += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            self._refill_locked()
+            queued = {name: 0 for name in PRIORITY_NAMES.values()}
+            for priority, _, waiter in self._queue:
+                if not waiter.cancelled:
+                    queued[PRIORITY_NAMES[priority]] += 1
+            return {
+                "in_flight": self._in_flight + self._routing_in_flight,
+                "max_concurrency": self.max_concurrency,
+                "routing_slots_in_flight": self._routing_in_flight,
+                "routing_slots": self.routing_slots,
+                "tokens_available": round(self._tokens, 2),
+                "queued": queued,
+                "granted": {PRIORITY_NAMES[p]: n for p, n in self._granted.items()},
+                "avg_wait_ms": {
+                    PRIORITY_NAMES[p]: round(1000 * self._wait_seconds[p] / n, 1) if n else 0.0
+                    for p, n in self._granted.items()
+                },
+                "max_wait_ms": {PRIORITY_NAMES[p]: round(1000 * w, 1) for p, w in self._max_wait.items()},
+                "rate_limited": self._rate_limited,
+                "retries_exhausted": self._retries_exhausted
+            }
+
+
+class ScheduledModel:
+    # Drop-in stand-in for the model handed to agents: every generation goes
+    # through the scheduler at this view's priority
+    def __init__(self, model, scheduler: LLMScheduler, priority: int):
+        self.model = model
+        self.scheduler = scheduler
+        self.priority = priority
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+    def generate_text(self, prompt=None, params: Optional[Dict] = None, **kwargs):
+        return self.scheduler.call(
+            self.priority, self.model.generate_text, prompt=prompt, params=params, **kwargs
+        )
+
+    def generate_text_stream(self, prompt=None, params: Optional[Dict] = None, **kwargs) -> Iterator[str]:
+        return self.scheduler.stream(
+            self.priority, self.model.generate_text_stream, prompt=prompt, params=params, **kwargs
+        )
+
+    async def agenerate_text(self, prompt=None, params: Optional[Dict] = None) -> str:
+        return await self.scheduler.acall(
+            self.priority, self.model.agenerate_text, prompt=prompt, params=params
+        )
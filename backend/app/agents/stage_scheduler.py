@@ -0,0 +1,42 @@
+from concurrent.futures import FIRST_COMPLETED, Executor, wait
+from typing import Any, Callable, Dict, Iterable, Iterator, Tuple
+
+
+class StageScheduler:
+    # Runs named stages on an executor as soon as the stages they depend on have
+    # finished. A stage function receives its dependencies' results as keyword
+    # arguments named after those stages.
+    def __init__(self, executor: Executor):
+        self.executor = executor
+        self._stages: Dict[str, Tuple[Callable, Tuple[str, ...]]] = {}
+
+    def add(self, name: str, fn: Callable, deps: Iterable[str] = ()) -> "StageScheduler":
+        deps = tuple(deps)
+        missing = [d for d in deps if d not in self._stages]
+        if missing:
+            raise ValueError(f"Stage '{name}' depends on unknown stage(s): {', '.join(missing)}")
+        self._stages[name] = (fn, deps)
+        return self
+
+    def iter_run(self) -> Iterator[Tuple[str, Any]]:
+        # Yields (stage, result) in completion order; the first failing stage
+        # re-raises here and stages that have not started yet are cancelled
+        results: Dict[str, Any] = {}
+        pending = dict(self._stages)
+        running = {}
+        try:
+            while pending or running:
+                for name in [n for n, (_, deps) in pending.items() if all(d in results for d in deps)]:
+                    fn, deps = pending.pop(name)
+                    running[self.executor.submit(fn, **{d: results[d] for d in deps})] = name
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    results[name] = future.result()
+                    yield name, results[name]
+        finally:
+            for future in running:
+                future.cancel()
+
+    def run(self) -> Dict[str, Any]:
+        return dict(self.iter_run())
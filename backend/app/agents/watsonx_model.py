@@ -1,9 +1,72 @@
+import asyncio
 import os
+import threading
+from concurrent.futures import Executor
+from typing import Dict, Iterator, Optional
+
 from ibm_watsonx_ai.foundation_models import ModelInference
 from ibm_watsonx_ai.metanames import GenTextParamsMetaNames as GenParams
 
 from ..settings.config import Config
 
+_loop = None
+_loop_pid = None
+_loop_lock = threading.Lock()
+
+
+def get_model_loop() -> asyncio.AbstractEventLoop:
+    # One long-lived event loop per process for the async pipeline. The SDK's
+    # async HTTP client pools connections on the loop that opened them, while
+    # Flask's async views run every request on a fresh loop that is closed
+    # afterwards; coroutines that touch the client therefore all run here.
+    global _loop, _loop_pid
+    with _loop_lock:
+        # The loop's thread does not survive fork, so each worker starts its own
+        if _loop is None or _loop_pid != os.getpid():
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, daemon=True, name="model-loop").start()
+            _loop, _loop_pid = loop, os.getpid()
+        return _loop
+
+
+async def run_on_model_loop(coro):
+    # Awaits coro on the shared model loop from whichever loop the caller runs on
+    loop = get_model_loop()
+    if asyncio.get_running_loop() is loop:
+        return await coro
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+
+class AsyncModel:
+    # Wraps ModelInference with an awaitable agenerate_text so
+    # an event loop can keep many generations in flight without a thread each.
+    # The SDK's native async client is used when it exists (callers run on
+    # get_model_loop() so its pooled connections stay on one loop); otherwise the
+    # blocking call runs in an executor. Sync methods and attributes pass through.
+    def __init__(self, model, executor: Optional[Executor] = None):
+        self.model = model
+        self.executor = executor
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+    def generate_text(self, prompt=None, params: Optional[Dict] = None, **kwargs):
+        return self.model.generate_text(prompt=prompt, params=params, **kwargs)
+
+    def generate_text_stream(self, prompt=None, params: Optional[Dict] = None, **kwargs) -> Iterator[str]:
+        return self.model.generate_text_stream(prompt=prompt, params=params, **kwargs)
+
+    async def agenerate_text(self, prompt=None, params: Optional[Dict] = None) -> str:
+        agenerate = getattr(self.model, "agenerate", None)
+        if agenerate is not None:
+            response = await agenerate(prompt=prompt, params=params)
+            return response["results"][0]["generated_text"]
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, lambda: self.model.generate_text(prompt=prompt, params=params)
+        )
+
+
 def setup_watsonx_model():
     params = {
         GenParams.DECODING_METHOD: "greedy",
@@ -11,9 +74,9 @@ def setup_watsonx_model():
         GenParams.TEMPERATURE: 0.7,
         GenParams.STOP_SEQUENCES: ["\n\n"]
     }
-    return ModelInference(
+    return AsyncModel(ModelInference(
         model_id="meta-llama/llama-3-3-70b-instruct",
         params=params,
         credentials={"url": Config.WATSONX_URL, "apikey": Config.WATSONX_APIKEY},
         project_id=Config.WATSONX_PROJECT_ID
-    )
+    ))
@@ -1,131 +1,476 @@
+import asyncio
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
 
+import numpy as np
 from langchain.memory import ConversationBufferMemory
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_chroma import Chroma
 
 from .agents.watsonx_model import setup_watsonx_model
+from .agents.llm_scheduler import ANALYSIS, BACKGROUND, ROUTING, SYNTHESIS, get_llm_scheduler
 from .tools.search_tool import SerperSearchService
 from .tools.location_extractor import LocationExtractor
+from .tools.gazetteer import Gazetteer
+from .tools.query_router import QueryRouter
+from .tools.greeting_classifier import GreetingClassifier
+from .tools.conversation_store import create_conversation_store
+from .tools.history_manager import HistoryManager
+from .tools.response_cache import ResponseCache
+from .tools.semantic_cache import SemanticCache
+from .tools.retriever import BatchRetriever, UnifiedRetriever
+from .tools.numpy_index import META_NAME as NUMPY_META_NAME, NumpyIndex
+from .tools.embedding_cache import CachedEmbeddings
 from .agents.climate_agent import ClimateAgent
 from .agents.business_agent import BusinessRiskAgent
+from .agents.stage_scheduler import StageScheduler
 from .settings.config import Config
 
+GREETING_RESPONSE = (
+    "<hello>"
+    "Hello! I am your Climate Risk Advisor Bot. "
+    "I use a Retrieval-Augmented Generation (RAG) approach, combining on-demand real-time search, "
+    "a local climate knowledge base, and IBM Watsonx AI to deliver tailored insights. "
+    "You can ask me questions like:\n"
+    "- 'What climate risks threaten our Chicago warehouse?'\n"
+    "- 'How will sea-level rise affect our coastal plant?'\n"
+    "Feel free to start with any location or say 'Global' to get a worldwide overview."
+    "</hello>"
+)
+
+FAREWELL_RESPONSE = "<bye>Goodbye! If you have more climate risk questions later, just let me know.</bye>"
+
+TAGGED_RESPONSE_PARAMS = {
+    "decoding_method": "greedy",
+    "max_new_tokens": 2000,
+    "temperature": 0.75,
+    "stop_sequences": ["</summary>"]
+}
+
+# Written by vector_store/embeddings.py after every ingest run; a change means
+# the stores were re-ingested and cached responses are stale
+INGEST_MANIFEST_NAME = "ingest_manifest.json"
+
+# Corpus names in the unified store's "corpus" metadata, as written by
+# vector_store/embeddings.py --unified (one manifest per corpus there)
+CLIMATE_CORPUS = "climate"
+BUSINESS_CORPUS = "risk"
+
+PLACEHOLDER_RESPONSE = (
+    "<current>\n"
+    "Placeholder current conditions\n"
+    "</current>\n"
+    "<history>\n"
+    "Placeholder historic trends\n"
+    "</history>\n"
+    "<future>\n"
+    "Placeholder future predictions\n"
+    "</future>\n"
+    "<risk>\n"
+    "Placeholder risk assessment\n"
+    "</risk>\n"
+    "<economy>\n"
+    "Placeholder economic impact\n"
+    "</economy>\n"
+    "<summary>\n"
+    "Placeholder summary with recommendations\n"
+    "</summary>"
+)
+
+_embeddings = None
+_embeddings_lock = threading.Lock()
+
+
+def get_shared_embeddings() -> CachedEmbeddings:
+    # The sentence-transformer weights are the largest thing a process holds.
+    # Loading them once per process (before fork, when gunicorn preloads the
+    # app) lets every worker share the same pages copy-on-write.
+    global _embeddings
+    with _embeddings_lock:
+        if _embeddings is None:
+            _embeddings = CachedEmbeddings(
+                HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2"),
+                max_entries=Config.EMBEDDING_CACHE_SIZE,
+                path=Config.EMBEDDING_CACHE_PATH or None
+            )
+        return _embeddings
+
+
 class ClimateRiskChatbot:
     def __init__(self):
-        # LLM setup
-        self.model = setup_watsonx_model()
+        # LLM setup: every call goes through the process-wide scheduler, with
+        # routing/location calls admitted before analyses, analyses before synthesis
+        # and history summaries only when nothing user-facing is waiting
+        base_model = setup_watsonx_model()
+        self.llm_scheduler = get_llm_scheduler()
+        routing_model = self.llm_scheduler.bind(base_model, ROUTING)
+        analysis_model = self.llm_scheduler.bind(base_model, ANALYSIS)
+        self.model = self.llm_scheduler.bind(base_model, SYNTHESIS)
         self.serper = SerperSearchService()
-        self.location_extractor = LocationExtractor(self.model)
+        gazetteer = Gazetteer.from_tsv(Config.GAZETTEER_PATH) if os.path.exists(Config.GAZETTEER_PATH) else None
+        self.location_extractor = LocationExtractor(
+            routing_model, gazetteer, min_confidence=Config.GAZETTEER_MIN_CONFIDENCE
+        )
+        self.router = QueryRouter(routing_model, self.location_extractor)
+        self.greeting_classifier = GreetingClassifier()
 
-        # Simple in-memory history: list of (user_query, bot_response) tuples
-        self.history = []
-        # Track the last non-Global location seen
-        self.last_location = None
+        # Per-session history of (user_query, bot_response) tuples and the last
+        # non-Global location seen in that session
+        self.conversations = create_conversation_store(
+            Config.CONVERSATION_BACKEND,
+            path=Config.CONVERSATION_DB_PATH,
+            max_sessions=Config.CONVERSATION_MAX_SESSIONS,
+            idle_ttl=Config.CONVERSATION_IDLE_TTL,
+            max_turns=Config.CONVERSATION_MAX_TURNS,
+            max_chars=Config.CONVERSATION_MAX_CHARS
+        )
+        self.history_manager = HistoryManager(
+            token_budget=Config.HISTORY_TOKEN_BUDGET,
+            recent_turns=Config.HISTORY_RECENT_TURNS,
+            model=self.llm_scheduler.bind(base_model, BACKGROUND) if Config.HISTORY_LLM_SUMMARY else None
+        )
 
-        # Chroma DB retrievers
-        embedding_fn = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
+        # Retrievers over the vector stores; see _open_stores for the layouts
+        embedding_fn = get_shared_embeddings()
+        self.embeddings = embedding_fn
         try:
-            self.climate_db = Chroma(
-                persist_directory=Config.CLIMATE_DB_DIR,
-                embedding_function=embedding_fn
-            )
-            self.business_db = Chroma(
-                persist_directory=Config.BUSINESS_DB_DIR,
-                embedding_function=embedding_fn
-            )
+            self.retrieval, climate_retriever, business_retriever, manifests = self._open_stores(embedding_fn)
         except Exception:
-            self.climate_db = None
-            self.business_db = None
+            self.retrieval = climate_retriever = business_retriever = None
+            manifests = []
 
-        self.climate_agent = ClimateAgent(
-            self.climate_db.as_retriever() if self.climate_db else None,
-            self.serper,
-            self.model
-        )
-        self.risk_agent = BusinessRiskAgent(
-            self.business_db.as_retriever() if self.business_db else None,
-            self.model
+        self.climate_agent = ClimateAgent(climate_retriever, self.serper, analysis_model)
+        self.risk_agent = BusinessRiskAgent(business_retriever, analysis_model)
+        self.response_cache = ResponseCache(
+            max_entries=Config.RESPONSE_CACHE_SIZE,
+            ttl=Config.RESPONSE_CACHE_TTL,
+            watch_paths=manifests
+        ) if Config.RESPONSE_CACHE_SIZE > 0 else None
+        self.semantic_cache = SemanticCache(
+            embedding_fn,
+            threshold=Config.SEMANTIC_CACHE_THRESHOLD,
+            per_location=Config.SEMANTIC_CACHE_PER_LOCATION,
+            max_locations=Config.SEMANTIC_CACHE_LOCATIONS,
+            ttl=Config.RESPONSE_CACHE_TTL,
+            watch_paths=manifests
+        ) if Config.SEMANTIC_CACHE_LOCATIONS > 0 else None
+        # Shared by the per-request stage schedulers in process_query_stream
+        self.stage_executor = ThreadPoolExecutor(
+            max_workers=Config.STAGE_WORKERS, thread_name_prefix="stage"
         )
 
-    def process_query(self, user_query: str) -> str:
-        # 1. Classification prompt
-        classification_prompt = (
-            "Classify the following user input.\n"
-            "If it is only a casual greeting (e.g., 'hello', 'hi'), respond with 'GREETING'.\n"
-            "If it is only a farewell (e.g., 'bye', 'goodbye'), respond with 'FAREWELL'.\n"
-            "Otherwise, respond with 'OTHER'.\n\n"
-            f"User: {user_query}\n\n"
-            "Classification:"
+    def _open_stores(self, embedding_fn) -> Tuple:
+        # Returns (unified retriever or None, climate retriever, business retriever,
+        # files that change whenever the stores are rebuilt). RETRIEVER_BACKEND=numpy
+        # reads memory-mapped indexes exported from Chroma; either backend prefers a
+        # unified store partitioned by corpus metadata over two separate stores.
+        if Config.RETRIEVER_BACKEND == "numpy":
+            unified_dir = os.path.join(Config.NUMPY_INDEX_DIR, "unified")
+            if os.path.isdir(unified_dir):
+                retrieval = UnifiedRetriever(NumpyIndex(unified_dir, embedding_fn, rescore_factor=Config.NUMPY_RESCORE_FACTOR))
+                return (retrieval, retrieval.corpus(CLIMATE_CORPUS), retrieval.corpus(BUSINESS_CORPUS),
+                        [os.path.join(unified_dir, NUMPY_META_NAME)])
+            dirs = [os.path.join(Config.NUMPY_INDEX_DIR, corpus) for corpus in (CLIMATE_CORPUS, BUSINESS_CORPUS)]
+            indexes = [NumpyIndex(d, embedding_fn, rescore_factor=Config.NUMPY_RESCORE_FACTOR) for d in dirs]
+            return (None, BatchRetriever(indexes[0]), BatchRetriever(indexes[1]),
+                    [os.path.join(d, NUMPY_META_NAME) for d in dirs])
+
+        if os.path.isdir(Config.UNIFIED_DB_DIR):
+            retrieval = UnifiedRetriever(Chroma(
+                persist_directory=Config.UNIFIED_DB_DIR,
+                embedding_function=embedding_fn
+            ))
+            return (retrieval, retrieval.corpus(CLIMATE_CORPUS), retrieval.corpus(BUSINESS_CORPUS), [
+                os.path.join(Config.UNIFIED_DB_DIR, f"ingest_manifest.{corpus}.json")
+                for corpus in (CLIMATE_CORPUS, BUSINESS_CORPUS)
+            ])
+        climate_db = Chroma(
+            persist_directory=Config.CLIMATE_DB_DIR,
+            embedding_function=embedding_fn
+        )
+        business_db = Chroma(
+            persist_directory=Config.BUSINESS_DB_DIR,
+            embedding_function=embedding_fn
         )
-        classification_params = {
-            "decoding_method": "greedy",
-            "max_new_tokens": 10,
-            "temperature": 0.0,
-            "stop_sequences": ["\n"]
-        }
-        classification = self.model.generate_text(
-            prompt=classification_prompt, params=classification_params
-        ).strip().upper()
+        return (None, BatchRetriever(climate_db), BatchRetriever(business_db), [
+            os.path.join(Config.CLIMATE_DB_DIR, INGEST_MANIFEST_NAME),
+            os.path.join(Config.BUSINESS_DB_DIR, INGEST_MANIFEST_NAME)
+        ])
+
+    def process_query(self, user_query: str, session_id: str = "default") -> str:
+        return self.answer(user_query, session_id)["response"]
+
+    def answer(self, user_query: str, session_id: str = "default") -> Dict:
+        # The final "done" event: {"response"} plus "cache" details (type and, for
+        # semantic hits, the similarity score and matched question) when cached
+        done = {"response": ""}
+        for event in self.process_query_stream(user_query, session_id):
+            if event["event"] == "done":
+                done = event
+            elif event["event"] == "error":
+                # Generation broke off mid-answer; never return the truncated text
+                done = {"response": PLACEHOLDER_RESPONSE}
+        return done
+
+    def process_query_stream(self, user_query: str, session_id: str = "default") -> Iterator[Dict]:
+        # Yields {"event": "stage"} progress events for each pipeline step, then the
+        # tagged response as {"event": "token"} pieces while it is generated, and
+        # finally {"event": "done"} with the full response, or {"event": "error"}
+        # if generation fails after part of the response was already sent
+        # 1. Obvious greetings/farewells are answered locally, queries naming a known
+        # place are resolved offline, and the rest go through one routing call
+        yield {"event": "stage", "stage": "routing"}
+        classification = self.greeting_classifier.classify(user_query)
+        if classification is None:
+            # A confident gazetteer hit means the query names a place, so it is
+            # neither a bare greeting nor a farewell and needs no routing call
+            match = self.location_extractor.locate(user_query)
+            if match is not None:
+                classification, loc_candidate = "OTHER", match["location"]
+            else:
+                classification, loc_candidate = self.router.route(user_query)
+                loc_candidate = self.location_extractor.canonicalize(loc_candidate)
+                self.location_extractor.record_llm()
 
         # 2. Handle GREETING
         if classification == "GREETING":
-            return (
-                "<hello>"
-                "Hello! I am your Climate Risk Advisor Bot. "
-                "I use a Retrieval-Augmented Generation (RAG) approach, combining on-demand real-time search, "
-                "a local climate knowledge base, and IBM Watsonx AI to deliver tailored insights. "
-                "You can ask me questions like:\n"
-                "- 'What climate risks threaten our Chicago warehouse?'\n"
-                "- 'How will sea-level rise affect our coastal plant?'\n"
-                "Feel free to start with any location or say 'Global' to get a worldwide overview."
-                "</hello>"
-            )
+            yield {"event": "done", "response": GREETING_RESPONSE}
+            return
 
         # 3. Handle FAREWELL
         if classification == "FAREWELL":
-            return "<bye>Goodbye! If you have more climate risk questions later, just let me know.</bye>"
+            yield {"event": "done", "response": FAREWELL_RESPONSE}
+            return
 
-        loc_candidate = self.location_extractor.extract_location(user_query).strip()
+        location, combined_input, has_history = self._prepare_context(session_id, user_query, loc_candidate)
 
-        if loc_candidate.lower() == "global":
-            if self.last_location:
-                location = self.last_location
-            else:
-                location = "Global"
-                self.last_location = None
+        # History-free questions are looked up in the exact cache once the (fast)
+        # retrievals are known, then in the semantic cache; only a miss pays for
+        # web search and the LLM chain
+        cache_key = query_vector = docs = None
+        if not has_history:
+            if self.response_cache is not None:
+                docs = self._retrieve_docs_concurrently(location)
+            cache_key, query_vector, hit = self._lookup_cached(location, user_query, docs)
+            if hit is not None:
+                self._remember(session_id, user_query, hit["response"])
+                yield {"event": "stage", "stage": "cache", "status": "hit", "location": location}
+                yield {"event": "done", **hit}
+                return
+
+        # Web search and both retrievals depend only on the location and run in
+        # parallel; each analysis starts as soon as its own inputs are ready
+        scheduler = StageScheduler(self.stage_executor)
+        scheduler.add("search", lambda: self.climate_agent.search(location))
+        if docs is not None:
+            scheduler.add("climate_docs", lambda: docs[0])
+            scheduler.add("business_docs", lambda: docs[1])
+        elif self.retrieval is not None:
+            # Both corpora from the unified store in one embedding pass
+            scheduler.add("docs", lambda: self._retrieve_docs(location))
+            scheduler.add("climate_docs", lambda docs: docs[0], deps=("docs",))
+            scheduler.add("business_docs", lambda docs: docs[1], deps=("docs",))
         else:
-            location = loc_candidate
-            self.last_location = loc_candidate
-
-        if self.history:
-            history_lines = []
-            for past_user, past_bot in self.history:
-                history_lines.append(f"User: {past_user}")
-                history_lines.append(f"Bot: {past_bot}")
-            combined_input = "\n".join(history_lines) + "\nUser: " + user_query
+            scheduler.add("climate_docs", lambda: self.climate_agent.retrieve(location))
+            scheduler.add("business_docs", lambda: self.risk_agent.retrieve(location))
+        scheduler.add(
+            "climate_analysis",
+            lambda search, climate_docs: self.climate_agent.analyze(
+                location, combined_input, search, climate_docs
+            ),
+            deps=("search", "climate_docs")
+        )
+        scheduler.add(
+            "business_analysis",
+            lambda climate_analysis, business_docs: self.risk_agent.analyze(
+                location, climate_analysis["analysis"], combined_input, business_docs
+            ),
+            deps=("climate_analysis", "business_docs")
+        )
+
+        yield {"event": "stage", "stage": "analysis", "location": location}
+        results = {}
+        for stage, result in scheduler.iter_run():
+            results[stage] = result
+            yield {"event": "stage", "stage": stage, "status": "done", "location": location}
+        climate_analysis = results["climate_analysis"]["analysis"]
+        business_analysis = results["business_analysis"]
+
+        yield {"event": "stage", "stage": "synthesis", "location": location}
+        pieces = []
+        try:
+            for piece in self._stream_tagged_response(location, climate_analysis, business_analysis):
+                pieces.append(piece)
+                yield {"event": "token", "text": piece}
+        except Exception as e:
+            # A truncated answer is neither cached nor kept in the session history
+            yield {"event": "error", "error": f"Response generation failed: {e}"}
+            return
+        final_response = "".join(pieces).strip()
+
+        self._store_cached(cache_key, query_vector, location, user_query, final_response)
+        self._remember(session_id, user_query, final_response)
+
+        yield {"event": "done", "response": final_response}
+
+    async def aprocess_query(self, user_query: str, session_id: str = "default") -> str:
+        return (await self.aanswer(user_query, session_id))["response"]
+
+    async def aanswer(self, user_query: str, session_id: str = "default") -> Dict:
+        # asyncio version of answer: every LLM call is awaited, so an event loop
+        # can hold many chats in flight; search, retrieval, query embedding and
+        # the conversation store still block and run on the stage executor
+        loop = asyncio.get_running_loop()
+        classification = self.greeting_classifier.classify(user_query)
+        if classification is None:
+            match = self.location_extractor.locate(user_query)
+            if match is not None:
+                classification, loc_candidate = "OTHER", match["location"]
+            else:
+                classification, loc_candidate = await self.router.aroute(user_query)
+                loc_candidate = self.location_extractor.canonicalize(loc_candidate)
+                self.location_extractor.record_llm()
+
+        if classification == "GREETING":
+            return {"response": GREETING_RESPONSE}
+        if classification == "FAREWELL":
+            return {"response": FAREWELL_RESPONSE}
+
+        location, combined_input, has_history = await loop.run_in_executor(
+            self.stage_executor, self._prepare_context, session_id, user_query, loc_candidate
+        )
+
+        # Same order as process_query_stream: the caches are probed before any
+        # web search starts, so a hit never pays for Serper
+        cache_key = query_vector = docs = None
+        if not has_history:
+            if self.response_cache is not None:
+                docs = await self._aretrieve_docs(location)
+            cache_key, query_vector, hit = await loop.run_in_executor(
+                self.stage_executor, self._lookup_cached, location, user_query, docs
+            )
+            if hit is not None:
+                await loop.run_in_executor(self.stage_executor, self._remember, session_id, user_query, hit["response"])
+                return hit
+
+        search = loop.run_in_executor(self.stage_executor, self.climate_agent.search, location)
+        if docs is None:
+            # gather retrieves the exception of whichever side fails second
+            search_results, (climate_docs, business_docs) = await asyncio.gather(
+                search, self._aretrieve_docs(location)
+            )
         else:
-            combined_input = user_query
+            climate_docs, business_docs = docs
+            search_results = await search
+        climate_result = await self.climate_agent.aanalyze(
+            location, combined_input, search_results, climate_docs
+        )
+        business_analysis = await self.risk_agent.aanalyze(
+            location, climate_result["analysis"], combined_input, business_docs
+        )
 
-        climate_results = self.climate_agent.analyze_climate_risks(location, combined_input)
-        climate_analysis = climate_results["analysis"]
+        final_response = await self._acreate_tagged_response(
+            location, climate_result["analysis"], business_analysis
+        )
+        self._store_cached(cache_key, query_vector, location, user_query, final_response)
+        await loop.run_in_executor(self.stage_executor, self._remember, session_id, user_query, final_response)
+        return {"response": final_response}
 
-        business_analysis = self.risk_agent.analyze_business_impact(
-            location, climate_analysis, combined_input
+    def _retrieve_docs(self, location: str) -> Tuple[List, List]:
+        # (climate docs, business docs) for a location; the unified store answers
+        # both with one embedding pass over all eight queries
+        if self.retrieval is None:
+            return self.climate_agent.retrieve(location), self.risk_agent.retrieve(location)
+        results = self.retrieval.multi_invoke({
+            CLIMATE_CORPUS: self.climate_agent.retrieval_queries(location),
+            BUSINESS_CORPUS: self.risk_agent.retrieval_queries(location)
+        }, k=2)
+        return (
+            [doc for docs in results[CLIMATE_CORPUS] for doc in docs],
+            [doc for docs in results[BUSINESS_CORPUS] for doc in docs]
         )
 
-        final_response = self._create_tagged_response(
-            location, climate_analysis, business_analysis
+    async def _aretrieve_docs(self, location: str) -> Tuple[List, List]:
+        # Awaitable _retrieve_docs_concurrently for the async pipeline
+        loop = asyncio.get_running_loop()
+        if self.retrieval is not None:
+            return await loop.run_in_executor(self.stage_executor, self._retrieve_docs, location)
+        climate_docs, business_docs = await asyncio.gather(
+            loop.run_in_executor(self.stage_executor, self.climate_agent.retrieve, location),
+            loop.run_in_executor(self.stage_executor, self.risk_agent.retrieve, location)
         )
+        return climate_docs, business_docs
 
-        self.history.append((user_query, final_response))
+    def _retrieve_docs_concurrently(self, location: str) -> Tuple[List, List]:
+        # _retrieve_docs for the request thread: the two separate stores are
+        # queried in parallel on the stage executor. Never call this from a stage
+        # worker, which would wait on its own pool.
+        if self.retrieval is not None:
+            return self._retrieve_docs(location)
+        climate = self.stage_executor.submit(self.climate_agent.retrieve, location)
+        business = self.stage_executor.submit(self.risk_agent.retrieve, location)
+        return climate.result(), business.result()
 
-        return final_response
+    def _lookup_cached(self, location: str, user_query: str,
+                       docs: Optional[Tuple[List, List]]) -> Tuple:
+        # Returns (exact cache key, query embedding, hit); the key and embedding
+        # are reused to store the answer on a miss
+        cache_key = query_vector = None
+        if self.response_cache is not None and docs is not None:
+            cache_key = self.response_cache.key(location, user_query, docs[0] + docs[1])
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                return cache_key, None, {"response": cached, "cache": {"type": "exact"}}
+        if self.semantic_cache is not None:
+            query_vector = self.semantic_cache.embed(user_query, location)
+            match = self.semantic_cache.get(location, query_vector)
+            if match is not None:
+                return cache_key, query_vector, {
+                    "response": match["response"],
+                    "cache": {"type": "semantic", "score": match["score"], "matched_query": match["matched_query"]}
+                }
+        return cache_key, query_vector, None
 
-    def _create_tagged_response(self, location: str, climate_analysis: str,
-                                business_analysis: str) -> str:
-        prompt = (
+    def _store_cached(self, cache_key: Optional[Tuple], query_vector: Optional[np.ndarray],
+                      location: str, user_query: str, response: str) -> None:
+        # The placeholder stands in for a failed generation and is never cached
+        if not response or response == PLACEHOLDER_RESPONSE:
+            return
+        if cache_key is not None:
+            self.response_cache.put(cache_key, response)
+        if query_vector is not None:
+            self.semantic_cache.put(location, query_vector, user_query, response)
+
+    def _prepare_context(self, session_id: str, user_query: str,
+                         loc_candidate: str) -> Tuple[str, str, bool]:
+        # Resolves "Global" to the session's last location and builds the
+        # history-aware input passed to both agents
+        history, last_location, summary = self.conversations.snapshot(session_id)
+        if loc_candidate.lower() == "global":
+            if last_location:
+                location = last_location
+            else:
+                location = "Global"
+        else:
+            location = loc_candidate
+            self.conversations.set_last_location(session_id, loc_candidate)
+
+        combined_input = self.history_manager.build(history, user_query, summary)
+        return location, combined_input, bool(history or summary)
+
+    def _remember(self, session_id: str, user_query: str, response: str) -> None:
+        # Appends the turn, then folds whatever left the recent window (or was
+        # evicted by the store's caps) into the session summary off the request
+        # path; with HISTORY_LLM_SUMMARY that is one LLM call per turn, once
+        dropped = self.conversations.append(session_id, user_query, response)
+        self.stage_executor.submit(self.history_manager.compact, self.conversations, session_id, dropped)
+
+    def _build_tagged_prompt(self, location: str, climate_analysis: str,
+                             business_analysis: str) -> str:
+        return (
             f"You are a C-suite Climate Risk Advisor.\n\n"
             f"LOCATION: {location}\n\n"
             f"CLIMATE ANALYSIS:\n{climate_analysis}\n\n"
@@ -144,35 +489,38 @@ class ClimateRiskChatbot:
             "  "
         )
 
-        enhanced_params = {
-            "decoding_method": "greedy",
-            "max_new_tokens": 2000,
-            "temperature": 0.75,
-            "stop_sequences": ["</summary>"]
-        }
+    def _create_tagged_response(self, location: str, climate_analysis: str,
+                                business_analysis: str) -> str:
+        prompt = self._build_tagged_prompt(location, climate_analysis, business_analysis)
+        try:
+            response_text = self.model.generate_text(prompt=prompt, params=TAGGED_RESPONSE_PARAMS).strip()
+        except Exception:
+            response_text = PLACEHOLDER_RESPONSE
+
+        return response_text
 
+    async def _acreate_tagged_response(self, location: str, climate_analysis: str,
+                                       business_analysis: str) -> str:
+        prompt = self._build_tagged_prompt(location, climate_analysis, business_analysis)
         try:
-            response_text = self.model.generate_text(prompt=prompt, params=enhanced_params).strip()
+            response_text = (await self.model.agenerate_text(prompt=prompt, params=TAGGED_RESPONSE_PARAMS)).strip()
         except Exception:
-            response_text = (
-                "<current>\n"
-                "Placeholder current conditions\n"
-                "</current>\n"
-                "<history>\n"
-                "Placeholder historic trends\n"
-                "</history>\n"
-                "<future>\n"
-                "Placeholder future predictions\n"
-                "</future>\n"
-                "<risk>\n"
-                "Placeholder risk assessment\n"
-                "</risk>\n"
-                "<economy>\n"
-                "Placeholder economic impact\n"
-                "</economy>\n"
-                "<summary>\n"
-                "Placeholder summary with recommendations\n"
-                "</summary>"
-            )
+            response_text = PLACEHOLDER_RESPONSE
 
         return response_text
+
+    def _stream_tagged_response(self, location: str, climate_analysis: str,
+                                business_analysis: str) -> Iterator[str]:
+        # A failure before the first piece falls back to the placeholder like the
+        # non-streaming path; once text has been sent the error is re-raised
+        prompt = self._build_tagged_prompt(location, climate_analysis, business_analysis)
+        streamed = False
+        try:
+            for piece in self.model.generate_text_stream(prompt=prompt, params=TAGGED_RESPONSE_PARAMS):
+                if piece:
+                    streamed = True
+                    yield piece
+        except Exception:
+            if streamed:
+                raise
+            yield PLACEHOLDER_RESPONSE
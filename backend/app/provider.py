@@ -0,0 +1,100 @@
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from .chatbot import ClimateRiskChatbot
+
+STARTUP_MODES = ("eager", "background", "lazy")
+
+
+class ChatbotProvider:
+    # Builds the ClimateRiskChatbot on first use instead of at import, so the
+    # server answers "/" and /api/ready immediately and, under gunicorn, the
+    # chatbot (watsonx client, Chroma stores, HTTP pools, thread pools) is
+    # created inside each worker after fork rather than in the master
+    def __init__(self, factory: Callable[[], ClimateRiskChatbot] = ClimateRiskChatbot,
+                 retry_interval: float = 30.0):
+        self.factory = factory
+        self.retry_interval = retry_interval
+        self.mode = "lazy"
+        self._chatbot: Optional[ClimateRiskChatbot] = None
+        self._lock = threading.Lock()
+        self._state = "cold"
+        self._error: Optional[str] = None
+        self._failed_at: Optional[float] = None
+        self._load_seconds: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._chatbot is not None
+
+    def get(self) -> ClimateRiskChatbot:
+        # Concurrent first requests wait for the one build; a failed build is
+        # retried by the next caller
+        chatbot = self._chatbot
+        if chatbot is not None:
+            return chatbot
+        with self._lock:
+            if self._chatbot is None:
+                self._state = "loading"
+                started = time.monotonic()
+                try:
+                    self._chatbot = self.factory()
+                except Exception as e:
+                    self._state = "failed"
+                    self._error = str(e)
+                    self._failed_at = time.monotonic()
+                    raise
+                self._load_seconds = round(time.monotonic() - started, 2)
+                self._state = "ready"
+                self._error = None
+            return self._chatbot
+
+    def start(self) -> None:
+        # Build on a background thread; progress is visible through status()
+        def build():
+            try:
+                self.get()
+            except Exception:
+                pass
+        threading.Thread(target=build, daemon=True, name="chatbot-init").start()
+
+    def warm(self, mode: str) -> bool:
+        # eager: build now (blocking), background: build on a thread, lazy: on first
+        # request. A failed eager build is recorded in status() rather than raised,
+        # so a gunicorn worker stays up to report it instead of crash-looping
+        if mode not in STARTUP_MODES:
+            raise ValueError(f"Unknown startup mode '{mode}', expected one of: {', '.join(STARTUP_MODES)}")
+        self.mode = mode
+        if mode == "eager":
+            try:
+                self.get()
+            except Exception:
+                return False
+        elif mode == "background":
+            self.start()
+        return True
+
+    def readiness(self) -> Dict:
+        # status() for /api/ready. A failed build is retried in the background at
+        # most once per retry_interval, so the worker recovers once the cause is
+        # fixed without waiting for traffic a readiness-gated balancer holds back
+        failed_at = self._failed_at
+        if self._state == "failed" and failed_at is not None and \
+                time.monotonic() - failed_at >= self.retry_interval:
+            self._failed_at = time.monotonic()
+            self.start()
+        return self.status()
+
+    def status(self) -> Dict:
+        # "ready" means able to serve: built, or in lazy mode not yet built (the
+        # first request builds it) as long as no build has failed
+        return {
+            "state": self._state,
+            "mode": self.mode,
+            "ready": self.ready or (self.mode == "lazy" and self._state == "cold"),
+            "pid": os.getpid(),
+            "load_seconds": self._load_seconds,
+            "error": self._error
+        }
@@ -1,13 +1,41 @@
-from flask import request, jsonify
+import json
+import uuid
 
-from .chatbot import ClimateRiskChatbot
+from flask import Response, request, jsonify, stream_with_context
+
+from .agents.watsonx_model import run_on_model_loop
+from .provider import ChatbotProvider
+from .tools.search_tool import connection_stats
+
+def _session_id(data) -> str:
+    # Clients identify their conversation with "session_id" in the body or an
+    # X-Session-Id header. A request without one gets a fresh id, so it is
+    # answered without history instead of sharing one with every other such client
+    return str(data.get("session_id") or request.headers.get("X-Session-Id") or uuid.uuid4().hex)
+
+def _chat_body(result) -> dict:
+    # "cache" records how a cached answer was found (exact key or semantic match
+    # with its similarity score) so served-from-cache responses can be audited
+    body = {"response": result["response"]}
+    if result.get("cache"):
+        body["cache"] = result["cache"]
+    return body
+
+def routes(app, provider=None):
+    # The chatbot is built by the provider on first use (see main.py for when
+    # it is warmed), so registering routes is cheap and "/" answers at once
+    provider = provider or ChatbotProvider()
 
-def routes(app):
     @app.route("/", methods=["GET"])
     def test():
         return jsonify({"response" : "server works"})
-    
-    chatbot = ClimateRiskChatbot()
+
+    @app.route("/api/ready", methods=["GET"])
+    def ready():
+        # 200 when this worker can serve chats (built, or lazy and not yet built),
+        # 503 while loading or after a failed build, with the error in the body
+        status = provider.readiness()
+        return jsonify(status), (200 if status["ready"] else 503)
 
     @app.route("/api/chat", methods=["POST"])
     def chat():
@@ -16,6 +44,81 @@ def routes(app):
         if not query:
             return jsonify({"error": "Missing 'query' in request"}), 400
 
-        response = chatbot.process_query(query)
-        print(response)
-        return jsonify({"response": response})
+        result = provider.get().answer(query, _session_id(data))
+        print(result["response"])
+        return jsonify(_chat_body(result))
+
+    @app.route("/api/chat/async", methods=["POST"])
+    async def chat_async():
+        # Same contract as /api/chat, served by the asyncio pipeline (needs flask[async]).
+        # Flask gives each request its own short-lived loop, so the pipeline itself
+        # runs on the process-wide model loop. The worker thread still waits for
+        # the whole chat, so concurrency per process stays bounded by the thread
+        # count; only an asyncio server awaiting aanswer directly lifts that
+        data = request.get_json()
+        query = data.get("query", "")
+        if not query:
+            return jsonify({"error": "Missing 'query' in request"}), 400
+
+        chatbot = provider.get()
+        result = await run_on_model_loop(chatbot.aanswer(query, _session_id(data)))
+        return jsonify(_chat_body(result))
+
+    @app.route("/api/chat/stream", methods=["POST"])
+    def chat_stream():
+        # Server-Sent Events: one "stage" event per pipeline step, "token" events
+        # while the tagged response is generated, then a final "done" event, or an
+        # "error" event (and no "done") when the answer breaks off part-way
+        data = request.get_json()
+        query = data.get("query", "")
+        if not query:
+            return jsonify({"error": "Missing 'query' in request"}), 400
+        session_id = _session_id(data)
+        chatbot = provider.get()
+
+        def generate():
+            try:
+                for event in chatbot.process_query_stream(query, session_id):
+                    yield f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
+            except Exception as e:
+                yield f"event: error\ndata: {json.dumps({'event': 'error', 'error': str(e)})}\n\n"
+
+        return Response(
+            stream_with_context(generate()),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+
+    @app.route("/api/cache/invalidate", methods=["POST"])
+    def invalidate_cache():
+        # Drops cached responses for one location, or all of them; call after
+        # re-ingesting the vector stores (manifest changes are also picked up
+        # automatically within a few seconds)
+        if not provider.ready:
+            # Nothing has been cached by a worker that has not built its chatbot yet
+            return jsonify({"invalidated": 0})
+        data = request.get_json(silent=True) or {}
+        chatbot = provider.get()
+        invalidated = 0
+        for cache in (chatbot.response_cache, chatbot.semantic_cache):
+            if cache is not None:
+                invalidated += cache.invalidate(data.get("location"))
+        return jsonify({"invalidated": invalidated})
+
+    @app.route("/api/metrics", methods=["GET"])
+    def metrics():
+        if not provider.ready:
+            return jsonify({"startup": provider.status()})
+        chatbot = provider.get()
+        return jsonify({
+            "startup": provider.status(),
+            "serper_connections": connection_stats(),
+            "search_cache": chatbot.serper.cache.stats(),
+            "embedding_cache": chatbot.embeddings.stats(),
+            "greeting_fast_path": chatbot.greeting_classifier.stats(),
+            "location_extraction": chatbot.location_extractor.stats(),
+            "conversations": chatbot.conversations.stats(),
+            "llm_scheduler": chatbot.llm_scheduler.stats(),
+            "response_cache": chatbot.response_cache.stats() if chatbot.response_cache else None,
+            "semantic_cache": chatbot.semantic_cache.stats() if chatbot.semantic_cache else None
+        })
@@ -8,5 +8,84 @@ class Config:
     WATSONX_APIKEY = os.getenv("WATSONX_AI_API", "")
     WATSONX_PROJECT_ID = os.getenv("PROJECT_ID", "")
     SERPER_API_KEY = os.getenv("SERPER_API_KEY", "")
+    # Per-request timeout and overall deadline (seconds) for the concurrent search fan-out
+    SERPER_TIMEOUT = float(os.getenv("SERPER_TIMEOUT", "10"))
+    SERPER_DEADLINE = float(os.getenv("SERPER_DEADLINE", "12"))
+    # Keep-alive connection pool shared by every SerperSearchService, sized for
+    # WEB_THREADS (8) concurrent chats x 4 searches each
+    SERPER_POOL_SIZE = int(os.getenv("SERPER_POOL_SIZE", "32"))
+    # Fan-out threads per process; more than the pool only queues on connections
+    SERPER_WORKERS = int(os.getenv("SERPER_WORKERS", str(SERPER_POOL_SIZE)))
+    SERPER_MAX_RETRIES = int(os.getenv("SERPER_MAX_RETRIES", "2"))
+    SERPER_BACKOFF = float(os.getenv("SERPER_BACKOFF", "0.3"))
+    # Search result cache; set SEARCH_CACHE_PATH to persist it across restarts
+    SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "512"))
+    SEARCH_CACHE_PATH = os.getenv("SEARCH_CACHE_PATH", "")
+    # Query embedding cache; set EMBEDDING_CACHE_PATH (.npz) to persist it across restarts
+    EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "4096"))
+    EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "")
+    # Offline gazetteer; the LLM is only asked for a location below this confidence
+    GAZETTEER_PATH = os.getenv(
+        "GAZETTEER_PATH",
+        os.path.join(os.path.dirname(__file__), "..", "..", "data", "gazetteer.tsv")
+    )
+    GAZETTEER_MIN_CONFIDENCE = float(os.getenv("GAZETTEER_MIN_CONFIDENCE", "0.75"))
+    # Threads shared by the per-request stage scheduler (search, retrieval, analyses)
+    STAGE_WORKERS = int(os.getenv("STAGE_WORKERS", "16"))
+    # Serving processes; gunicorn.conf.py exports its worker count here
+    WEB_WORKERS = int(os.getenv("WEB_WORKERS", "1"))
+    # Conversation history per session: "memory" (LRU of idle sessions) or "sqlite".
+    # The memory store is per process, so several workers default to sqlite
+    CONVERSATION_BACKEND = os.getenv("CONVERSATION_BACKEND", "sqlite" if WEB_WORKERS > 1 else "memory")
+    CONVERSATION_DB_PATH = os.getenv("CONVERSATION_DB_PATH", "conversations.db")
+    CONVERSATION_MAX_SESSIONS = int(os.getenv("CONVERSATION_MAX_SESSIONS", "1000"))
+    CONVERSATION_IDLE_TTL = float(os.getenv("CONVERSATION_IDLE_TTL", "3600"))
+    CONVERSATION_MAX_TURNS = int(os.getenv("CONVERSATION_MAX_TURNS", "20"))
+    CONVERSATION_MAX_CHARS = int(os.getenv("CONVERSATION_MAX_CHARS", "40000"))
+    # Admission control for watsonx calls: token-bucket rate (requests per second,
+    # with burst), a cap on generations in flight, and retries with jittered
+    # exponential backoff when the service answers 429. Rate, burst and
+    # concurrency are totals for the deployment, split evenly across WEB_WORKERS
+    LLM_RATE_PER_SECOND = float(os.getenv("LLM_RATE_PER_SECOND", "8"))
+    LLM_BURST = int(os.getenv("LLM_BURST", "8"))
+    LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+    # Extra slots per worker that only routing/location calls may use, so those
+    # short calls never wait behind a full set of long generations
+    LLM_ROUTING_SLOTS = int(os.getenv("LLM_ROUTING_SLOTS", "1"))
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+    LLM_BACKOFF = float(os.getenv("LLM_BACKOFF", "0.5"))
+    LLM_MAX_BACKOFF = float(os.getenv("LLM_MAX_BACKOFF", "8"))
+    # Complete responses for history-free queries, keyed by location, question
+    # intent and retrieved chunks; RESPONSE_CACHE_SIZE=0 disables the cache
+    RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "512"))
+    RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", str(24 * 60 * 60)))
+    # Near-duplicate questions: cosine similarity of MiniLM query embeddings,
+    # compared only within the same location; SEMANTIC_CACHE_LOCATIONS=0 disables it
+    SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.9"))
+    SEMANTIC_CACHE_PER_LOCATION = int(os.getenv("SEMANTIC_CACHE_PER_LOCATION", "64"))
+    SEMANTIC_CACHE_LOCATIONS = int(os.getenv("SEMANTIC_CACHE_LOCATIONS", "512"))
+    # eager: build the chatbot before serving; background: build on a thread
+    # while /api/ready reports progress; lazy: build on the first chat request.
+    # PRELOAD_EMBEDDINGS loads the MiniLM weights at import (in the gunicorn
+    # master when preload_app is on) so forked workers share them.
+    STARTUP_MODE = os.getenv("STARTUP_MODE", "eager")
+    PRELOAD_EMBEDDINGS = os.getenv("PRELOAD_EMBEDDINGS", "1") == "1"
+    # Token budget for the conversation context embedded in agent prompts; turns
+    # older than HISTORY_RECENT_TURNS are folded once into a per-session rolling
+    # summary, written by the LLM when HISTORY_LLM_SUMMARY=1 and extracted from
+    # <summary> sections otherwise
+    HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "1500"))
+    HISTORY_RECENT_TURNS = int(os.getenv("HISTORY_RECENT_TURNS", "2"))
+    HISTORY_LLM_SUMMARY = os.getenv("HISTORY_LLM_SUMMARY", "0") == "1"
     CLIMATE_DB_DIR = ".../vector_store/climate_chroma_db"
     BUSINESS_DB_DIR = ".../vector_store/risk_chroma_db"
+    # Single store holding both corpora, tagged with "corpus" metadata (built by
+    # vector_store/embeddings.py --unified); used instead of the two above when present
+    UNIFIED_DB_DIR = os.getenv("UNIFIED_DB_DIR", ".../vector_store/unified_chroma_db")
+    # "chroma" or "numpy": the numpy backend reads memory-mapped indexes written
+    # by vector_store/export_numpy_index.py into NUMPY_INDEX_DIR/<corpus> (or /unified)
+    RETRIEVER_BACKEND = os.getenv("RETRIEVER_BACKEND", "chroma")
+    NUMPY_INDEX_DIR = os.getenv("NUMPY_INDEX_DIR", ".../vector_store/numpy_index")
+    # Candidates per result rescored exactly when a float16/int8 index ships with
+    # its float32 copy (export_numpy_index.py --rescore)
+    NUMPY_RESCORE_FACTOR = int(os.getenv("NUMPY_RESCORE_FACTOR", "4"))
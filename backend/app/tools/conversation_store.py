@@ -0,0 +1,223 @@
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+
+class InMemoryConversationStore:
+    # Per-session history, rolling summary of older turns, and last location.
+    # Idle sessions are evicted LRU-first once max_sessions is exceeded or after
+    # idle_ttl seconds, and each session keeps at most max_turns turns /
+    # max_chars characters of history; append() returns the turns it dropped so
+    # they can be folded into the summary.
+    def __init__(self, max_sessions: int = 1000, idle_ttl: float = 3600,
+                 max_turns: int = 20, max_chars: int = 40000):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.max_turns = max_turns
+        self.max_chars = max_chars
+        self._sessions: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def snapshot(self, session_id: str) -> Tuple[List[Tuple[str, str]], Optional[str], str]:
+        # (history, last location, rolling summary of the turns no longer in history)
+        with self._lock:
+            session = self._touch(session_id)
+            return list(session["history"]), session["last_location"], session["summary"]
+
+    def set_last_location(self, session_id: str, location: Optional[str]) -> None:
+        with self._lock:
+            self._touch(session_id)["last_location"] = location
+
+    def append(self, session_id: str, user_query: str, response: str) -> List[Tuple[str, str]]:
+        with self._lock:
+            session = self._touch(session_id)
+            session["history"].append((user_query, response))
+            session["chars"] += len(user_query) + len(response)
+            # The newest turn is always kept, even if it alone exceeds max_chars
+            dropped = []
+            while len(session["history"]) > self.max_turns or (
+                    len(session["history"]) > 1 and session["chars"] > self.max_chars):
+                old_query, old_response = session["history"].pop(0)
+                session["chars"] -= len(old_query) + len(old_response)
+                dropped.append((old_query, old_response))
+            return dropped
+
+    def fold(self, session_id: str, turns: List[Tuple[str, str]], summary: str) -> bool:
+        # Replaces the summary and removes turns from the front of the history, but
+        # only if they are still there (a concurrent fold may already have done it)
+        with self._lock:
+            session = self._touch(session_id)
+            count = len(turns)
+            if [tuple(t) for t in session["history"][:count]] != [tuple(t) for t in turns]:
+                return False
+            del session["history"][:count]
+            session["chars"] -= sum(len(q) + len(r) for q, r in turns)
+            session["summary"] = summary
+            return True
+
+    def clear(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "backend": "memory",
+                "sessions": len(self._sessions),
+                "turns": sum(len(s["history"]) for s in self._sessions.values()),
+                "chars": sum(s["chars"] for s in self._sessions.values()),
+                "evictions": self.evictions
+            }
+
+    def _touch(self, session_id: str) -> Dict:
+        now = time.time()
+        # Oldest-first order means idle sessions are always at the front
+        while self._sessions:
+            oldest_id, oldest = next(iter(self._sessions.items()))
+            if oldest_id == session_id or now - oldest["last_seen"] < self.idle_ttl:
+                break
+            self._sessions.popitem(last=False)
+            self.evictions += 1
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = {"history": [], "chars": 0, "last_location": None, "summary": ""}
+            self._sessions[session_id] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evictions += 1
+        session["last_seen"] = now
+        self._sessions.move_to_end(session_id)
+        return session
+
+
+class SQLiteConversationStore:
+    # Same interface backed by one SQLite file, so history survives restarts and
+    # is shared by every worker process pointing at the same path
+    def __init__(self, path: str, idle_ttl: float = 7 * 24 * 3600,
+                 max_turns: int = 20, max_chars: int = 40000):
+        self.idle_ttl = idle_ttl
+        self.max_turns = max_turns
+        self.max_chars = max_chars
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._writes = 0
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "session_id TEXT PRIMARY KEY, last_location TEXT, last_seen REAL NOT NULL, "
+                "summary TEXT NOT NULL DEFAULT '')"
+            )
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(sessions)")}
+            if "summary" not in columns:
+                # Databases created before rolling summaries were kept per session
+                self._conn.execute("ALTER TABLE sessions ADD COLUMN summary TEXT NOT NULL DEFAULT ''")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS turns ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, session_id TEXT NOT NULL, "
+                "user_query TEXT NOT NULL, response TEXT NOT NULL, chars INTEGER NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS turns_session ON turns (session_id, id)")
+
+    def snapshot(self, session_id: str) -> Tuple[List[Tuple[str, str]], Optional[str], str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT last_location, summary FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            turns = self._conn.execute(
+                "SELECT user_query, response FROM turns WHERE session_id = ? ORDER BY id", (session_id,)
+            ).fetchall()
+        return [(q, r) for q, r in turns], (row[0] if row else None), (row[1] if row else "")
+
+    def set_last_location(self, session_id: str, location: Optional[str]) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO sessions (session_id, last_location, last_seen) VALUES (?, ?, ?) "
+                "ON CONFLICT(session_id) DO UPDATE SET last_location = excluded.last_location, "
+                "last_seen = excluded.last_seen",
+                (session_id, location, time.time())
+            )
+
+    def append(self, session_id: str, user_query: str, response: str) -> List[Tuple[str, str]]:
+        now = time.time()
+        dropped = []
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO sessions (session_id, last_location, last_seen) VALUES (?, NULL, ?) "
+                "ON CONFLICT(session_id) DO UPDATE SET last_seen = excluded.last_seen",
+                (session_id, now)
+            )
+            self._conn.execute(
+                "INSERT INTO turns (session_id, user_query, response, chars) VALUES (?, ?, ?, ?)",
+                (session_id, user_query, response, len(user_query) + len(response))
+            )
+            # Drop the oldest turns beyond the per-session turn and character caps
+            rows = self._conn.execute(
+                "SELECT id, chars FROM turns WHERE session_id = ? ORDER BY id DESC", (session_id,)
+            ).fetchall()
+            kept_chars = 0
+            for position, (turn_id, chars) in enumerate(rows):
+                kept_chars += chars
+                if position >= self.max_turns or (position > 0 and kept_chars > self.max_chars):
+                    dropped = self._conn.execute(
+                        "SELECT user_query, response FROM turns WHERE session_id = ? AND id <= ? ORDER BY id",
+                        (session_id, turn_id)
+                    ).fetchall()
+                    self._conn.execute(
+                        "DELETE FROM turns WHERE session_id = ? AND id <= ?", (session_id, turn_id)
+                    )
+                    break
+            self._writes += 1
+            if self._writes % 100 == 0:
+                self._expire(now)
+        return [(q, r) for q, r in dropped]
+
+    def fold(self, session_id: str, turns: List[Tuple[str, str]], summary: str) -> bool:
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                "SELECT id, user_query, response FROM turns WHERE session_id = ? ORDER BY id LIMIT ?",
+                (session_id, len(turns))
+            ).fetchall()
+            if [(q, r) for _, q, r in rows] != [tuple(t) for t in turns]:
+                return False
+            if rows:
+                self._conn.execute(
+                    "DELETE FROM turns WHERE session_id = ? AND id <= ?", (session_id, rows[-1][0])
+                )
+            self._conn.execute(
+                "INSERT INTO sessions (session_id, last_location, last_seen, summary) VALUES (?, NULL, ?, ?) "
+                "ON CONFLICT(session_id) DO UPDATE SET summary = excluded.summary, last_seen = excluded.last_seen",
+                (session_id, time.time(), summary)
+            )
+            return True
+
+    def clear(self, session_id: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM turns WHERE session_id = ?", (session_id,))
+            self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def stats(self) -> Dict:
+        with self._lock:
+            sessions = self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+            turns, chars = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(chars), 0) FROM turns").fetchone()
+        return {"backend": "sqlite", "sessions": sessions, "turns": turns, "chars": chars}
+
+    def _expire(self, now: float) -> None:
+        cutoff = now - self.idle_ttl
+        self._conn.execute(
+            "DELETE FROM turns WHERE session_id IN (SELECT session_id FROM sessions WHERE last_seen < ?)",
+            (cutoff,)
+        )
+        self._conn.execute("DELETE FROM sessions WHERE last_seen < ?", (cutoff,))
+
+
+def create_conversation_store(backend: str, path: str = "", max_sessions: int = 1000,
+                              idle_ttl: float = 3600, max_turns: int = 20, max_chars: int = 40000):
+    if backend == "sqlite":
+        return SQLiteConversationStore(path or "conversations.db", idle_ttl=idle_ttl,
+                                       max_turns=max_turns, max_chars=max_chars)
+    return InMemoryConversationStore(max_sessions=max_sessions, idle_ttl=idle_ttl,
+                                     max_turns=max_turns, max_chars=max_chars)
@@ -0,0 +1,151 @@
+import atexit
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+class CachedEmbeddings(Embeddings):
+    # LRU cache in front of an embeddings model. Vectors live in one preallocated
+    # float32 slab; the OrderedDict only maps normalized text to a slab row.
+    def __init__(self, inner: Embeddings, max_entries: int = 4096,
+                 path: Optional[str] = None, lowercase: bool = True):
+        self.inner = inner
+        self.max_entries = max_entries
+        self.path = path
+        # all-MiniLM-L6-v2 is uncased, so folding case does not change its vectors
+        self.lowercase = lowercase
+        self._slots: "OrderedDict[str, int]" = OrderedDict()
+        self._free: List[int] = []
+        self._vectors: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        # Persistence is attached in the first process that embeds something, not
+        # at construction: a gunicorn master that only preloads the weights must
+        # never register an exit-time save over what its workers wrote
+        self._persist_pid: Optional[int] = None
+        self._persist_lock = threading.Lock()
+        self._dirty = False
+
+    def normalize(self, text: str) -> str:
+        text = " ".join(text.split())
+        return text.lower() if self.lowercase else text
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.max_entries <= 0:
+            return self.inner.embed_documents(texts)
+        self._attach_persistence()
+        keys = [self.normalize(t) for t in texts]
+        found = self._lookup(keys)
+        missing = list(dict.fromkeys(k for k, v in zip(keys, found) if v is None))
+        if missing:
+            # One batched forward pass for every uncached text; fill the gaps from
+            # the returned vectors since the batch may not all fit in (or survive) the LRU
+            computed = [np.asarray(v, dtype=np.float32) for v in self.inner.embed_documents(missing)]
+            self._store(missing, computed)
+            by_key = dict(zip(missing, computed))
+            found = [by_key[k] if v is None else v for k, v in zip(keys, found)]
+        return [v.tolist() for v in found]
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self.normalize(text)
+        if self.max_entries <= 0:
+            return self.inner.embed_query(key)
+        self._attach_persistence()
+        vector = self._lookup([key])[0]
+        if vector is None:
+            vector = np.asarray(self.inner.embed_query(key), dtype=np.float32)
+            self._store([key], [vector])
+        return vector.tolist()
+
+    def _attach_persistence(self) -> None:
+        if not self.path or self._persist_pid == os.getpid():
+            return
+        with self._persist_lock:
+            if self._persist_pid == os.getpid():
+                return
+            self._persist_pid = os.getpid()
+            self._load()
+            with self._lock:
+                self._dirty = False
+            atexit.register(self.save)
+
+    def _lookup(self, keys: List[str], count: bool = True) -> List[Optional[np.ndarray]]:
+        out = []
+        with self._lock:
+            for key in keys:
+                slot = self._slots.get(key)
+                if slot is None:
+                    if count:
+                        self.misses += 1
+                    out.append(None)
+                    continue
+                self._slots.move_to_end(key)
+                if count:
+                    self.hits += 1
+                out.append(self._vectors[slot].copy())
+        return out
+
+    def _store(self, keys: List[str], vectors: List[List[float]]) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            for key, vector in zip(keys, vectors):
+                vector = np.asarray(vector, dtype=np.float32)
+                if self._vectors is None:
+                    self._vectors = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+                    self._free = list(range(self.max_entries - 1, -1, -1))
+                slot = self._slots.get(key)
+                if slot is None:
+                    if not self._free:
+                        _, evicted = self._slots.popitem(last=False)
+                        self._free.append(evicted)
+                    slot = self._free.pop()
+                    self._slots[key] = slot
+                self._vectors[slot] = vector
+                self._slots.move_to_end(key)
+                self._dirty = True
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._slots),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "bytes": int(self._vectors.nbytes) if self._vectors is not None else 0
+            }
+
+    def save(self) -> None:
+        # Only the process that loaded the file writes it back, and only when it
+        # embedded something new since
+        if not self.path or self._persist_pid != os.getpid():
+            return
+        with self._lock:
+            if not self._slots or not self._dirty:
+                return
+            self._dirty = False
+            keys = list(self._slots.keys())
+            vectors = self._vectors[[self._slots[k] for k in keys]]
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Per-process temp name so workers sharing the path never clobber each other
+        tmp_path = f"{self.path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp_path, keys=np.array(keys, dtype=str), vectors=vectors)
+        os.replace(tmp_path, self.path)
+
+    def _load(self) -> None:
+        try:
+            with np.load(self.path) as data:
+                keys, vectors = [str(k) for k in data["keys"]], data["vectors"]
+        except (OSError, ValueError, KeyError):
+            return
+        # Keep the most recently used tail if the file outgrew the current bound
+        keep = slice(max(len(keys) - self.max_entries, 0), None)
+        self._store(keys[keep], vectors[keep])
@@ -0,0 +1,188 @@
+import csv
+import re
+import unicodedata
+from typing import Dict, List, Optional
+
+# Names that are also everyday English words; a lowercase match on one of
+# these ("a nice warehouse") is too weak to trust without the LLM
+COMMON_WORDS = {"nice", "buffalo", "mobile", "reading", "bath", "split", "orange",
+                "turkey", "chile", "china", "jersey", "phoenix", "lima", "victoria"}
+
+_TOKEN_RE = re.compile(r"[^\W_]+")
+_TERMINAL = "$"
+
+
+def fold(text: str) -> str:
+    # Lowercase and strip accents so "São Paulo" and "Sao Paulo" share one key
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+
+
+def tokenize(text: str) -> List[str]:
+    # Dots and apostrophes are dropped rather than split on: "D.C." -> "DC", "St." -> "St"
+    return _TOKEN_RE.findall(re.sub(r"[.'’]", "", text))
+
+
+class Gazetteer:
+    # City/admin/country table loaded into a token trie; scanning a query takes one
+    # longest-match walk per token position, independent of the table size
+    def __init__(self, entries: List[Dict]):
+        self.entries = entries
+        self.countries = {e["country_code"]: e["name"] for e in entries if e["feature_class"] == "C"}
+        self._admin_names = {(e["country_code"], e["name"]) for e in entries if e["feature_class"] == "A"}
+        self._trie: Dict = {}
+        # Upper-case abbreviations (NYC, UAE, TX) only match when written in capitals
+        self._codes: Dict[str, List[int]] = {}
+        for idx, entry in enumerate(entries):
+            for name in {entry["name"], entry["asciiname"], *entry["alternatenames"]}:
+                tokens = [fold(t) for t in tokenize(name)]
+                if tokens:
+                    self._insert(tokens, idx)
+            for code in entry["codes"]:
+                self._codes.setdefault(code, []).append(idx)
+
+    @classmethod
+    def from_tsv(cls, path: str) -> "Gazetteer":
+        entries = []
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            rows = csv.reader((line for line in f if not line.startswith("#")), delimiter="\t")
+            for row in rows:
+                if not row or row[0] == "name":
+                    continue
+                name, asciiname, alternates, lat, lon, fclass, country, admin1, population, codes = row[:10]
+                entries.append({
+                    "name": name,
+                    "asciiname": asciiname or name,
+                    "alternatenames": [a for a in alternates.split(";") if a],
+                    "latitude": float(lat),
+                    "longitude": float(lon),
+                    "feature_class": fclass,
+                    "country_code": country,
+                    "admin1": admin1,
+                    "population": int(population or 0),
+                    "codes": [c for c in codes.split(";") if c]
+                })
+        return cls(entries)
+
+    def _insert(self, tokens: List[str], idx: int) -> None:
+        node = self._trie
+        for token in tokens:
+            node = node.setdefault(token, {})
+        bucket = node.setdefault(_TERMINAL, [])
+        if idx not in bucket:
+            bucket.append(idx)
+
+    def canonical_name(self, entry: Dict) -> str:
+        country = self.countries.get(entry["country_code"], entry["country_code"])
+        if entry["feature_class"] == "C":
+            return entry["name"]
+        parts = [entry["name"]]
+        # Keep the admin area when it repeats the city name but is also a separate
+        # entry ("New York, New York"), so city and state never share a key
+        if entry["feature_class"] == "P" and entry["admin1"] and (
+                entry["admin1"] != entry["name"] or (entry["country_code"], entry["admin1"]) in self._admin_names):
+            parts.append(entry["admin1"])
+        parts.append(country)
+        return ", ".join(parts)
+
+    def _scan(self, text: str) -> List[Dict]:
+        original = tokenize(text)
+        folded = [fold(t) for t in original]
+        matches = []
+        i = 0
+        while i < len(folded):
+            node, end, found = self._trie, None, None
+            for j in range(i, len(folded)):
+                node = node.get(folded[j])
+                if node is None:
+                    break
+                if _TERMINAL in node:
+                    end, found = j + 1, node[_TERMINAL]
+            if found:
+                span = original[i:end]
+                matches.append({
+                    "start": i, "end": end, "candidates": list(found),
+                    "text": " ".join(span),
+                    "capitalized": any(t[0].isupper() for t in span),
+                    "qualifier_only": False
+                })
+                i = end
+                continue
+            if original[i].isupper() and original[i] in self._codes:
+                # Two-letter admin/country codes (IL, TX, US) only qualify a preceding
+                # name; city codes (LA, SF) and longer ones (NYC, UAE) stand alone
+                candidates = list(self._codes[original[i]])
+                standalone = [c for c in candidates
+                              if len(original[i]) > 2 or self.entries[c]["feature_class"] == "P"]
+                matches.append({
+                    "start": i, "end": i + 1, "candidates": candidates, "standalone": standalone,
+                    "text": original[i], "capitalized": True,
+                    "qualifier_only": not standalone
+                })
+            i += 1
+        return matches
+
+    def _qualifies(self, qualifier: Dict, entry: Dict) -> bool:
+        if qualifier["country_code"] != entry["country_code"] or qualifier is entry:
+            return False
+        if qualifier["feature_class"] == "C":
+            return entry["feature_class"] != "C"
+        return qualifier["feature_class"] == "A" and entry["feature_class"] == "P" \
+            and qualifier["admin1"] == entry["admin1"]
+
+    def _score(self, entry: Dict) -> float:
+        # Cities win name clashes with a similarly sized admin area ("New York")
+        return entry["population"] * (3 if entry["feature_class"] == "P" else 1)
+
+    def locate(self, text: str) -> Optional[Dict]:
+        matches = self._scan(text)
+        consumed = set()
+        resolved = []
+        for idx, match in enumerate(matches):
+            if idx in consumed or match["qualifier_only"]:
+                continue
+            candidates = [self.entries[c] for c in match.get("standalone", match["candidates"])]
+            # "Portland, Maine" / "Paris France" / "Chicago IL, USA": following names
+            # that contain a candidate narrow it down and are not separate locations
+            qualified = False
+            last_end = match["end"]
+            for q_idx in range(idx + 1, len(matches)):
+                follower = matches[q_idx]
+                if follower["start"] - last_end > 1:
+                    break
+                narrowed = [c for c in candidates
+                            if any(self._qualifies(self.entries[q], c) for q in follower["candidates"])]
+                if not narrowed:
+                    break
+                candidates = narrowed
+                consumed.add(q_idx)
+                qualified = True
+                last_end = follower["end"]
+
+            candidates.sort(key=self._score, reverse=True)
+            best = candidates[0]
+            confidence = 0.95 if match["capitalized"] else 0.8
+            if not match["capitalized"] and fold(match["text"]) in COMMON_WORDS:
+                confidence = 0.3
+            if len(candidates) > 1:
+                ratio = self._score(candidates[1]) / max(self._score(best), 1)
+                confidence -= 0.3 * min(ratio, 1.0)
+            if qualified:
+                confidence = min(confidence + 0.04, 0.99)
+            resolved.append((best, confidence, match["text"]))
+
+        if not resolved:
+            return None
+        best, confidence, matched = resolved[0]
+        if len({id(entry) for entry, _, _ in resolved}) > 1:
+            # Several distinct places mentioned; let the LLM decide which one is meant
+            confidence = min(confidence, 0.5)
+        return {
+            "location": self.canonical_name(best),
+            "name": best["name"],
+            "country_code": best["country_code"],
+            "latitude": best["latitude"],
+            "longitude": best["longitude"],
+            "confidence": round(confidence, 3),
+            "matched": matched
+        }
@@ -0,0 +1,91 @@
+import difflib
+import re
+import threading
+from typing import Dict, Optional
+
+GREETING_PHRASES = {
+    "hi", "hey", "hello", "hiya", "howdy", "yo", "greetings", "good morning",
+    "good afternoon", "good evening", "morning", "hi there", "hello there",
+    "hey there", "whats up", "sup", "how are you", "how are you doing",
+    "hows it going", "nice to meet you"
+}
+
+FAREWELL_PHRASES = {
+    "bye", "goodbye", "good bye", "bye bye", "see you", "see you later",
+    "see ya", "later", "farewell", "good night", "goodnight", "take care",
+    "cya", "thats all", "that is all", "im done", "thanks bye",
+    "thank you bye", "have a good day", "have a nice day"
+}
+
+# Leading/trailing filler that does not change the intent ("hi bot", "thanks, bye")
+_FILLER = {"bot", "there", "again", "all", "everyone", "friend", "assistant",
+           "thanks", "thank", "you", "ok", "okay", "so", "well", "then", "for", "now"}
+_NON_WORD = re.compile(r"[^a-z\s]+")
+_REPEATS = re.compile(r"(.)\1{2,}")
+
+
+class GreetingClassifier:
+    # Zero-network pre-classifier for obvious greetings and farewells; anything it
+    # is unsure about returns None and goes on to the LLM router
+    def __init__(self, max_words: int = 6, fuzzy_cutoff: float = 0.85):
+        self.max_words = max_words
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self._vocab = {p: "GREETING" for p in GREETING_PHRASES}
+        self._vocab.update({p: "FAREWELL" for p in FAREWELL_PHRASES})
+        self._lock = threading.Lock()
+        self._counts = {"checked": 0, "greeting": 0, "farewell": 0, "fuzzy": 0, "passthrough": 0}
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        text = text.lower().replace("'", "").replace("’", "")
+        text = _NON_WORD.sub(" ", text)
+        # "hiii" / "byeeee" -> "hi" / "bye"
+        text = _REPEATS.sub(r"\1", text)
+        return " ".join(text.split())
+
+    def classify(self, text: str) -> Optional[str]:
+        intent, fuzzy = self._classify(text)
+        with self._lock:
+            self._counts["checked"] += 1
+            if intent is None:
+                self._counts["passthrough"] += 1
+            else:
+                self._counts[intent.lower()] += 1
+                if fuzzy:
+                    self._counts["fuzzy"] += 1
+        return intent
+
+    def _classify(self, text: str):
+        normalized = self.normalize(text)
+        words = normalized.split()
+        if not words or len(words) > self.max_words:
+            return None, False
+        candidates = [normalized, self._strip_filler(words)]
+        for candidate in candidates:
+            if candidate in self._vocab:
+                return self._vocab[candidate], False
+        # Fuzzy match only on inputs long enough that a typo is distinguishable
+        # from a different short word ("hey" vs "key")
+        for candidate in candidates:
+            if len(candidate) < 4:
+                continue
+            match = difflib.get_close_matches(candidate, self._vocab.keys(), n=1, cutoff=self.fuzzy_cutoff)
+            if match:
+                return self._vocab[match[0]], True
+        return None, False
+
+    @staticmethod
+    def _strip_filler(words) -> str:
+        start, end = 0, len(words)
+        while start < end and words[start] in _FILLER:
+            start += 1
+        while end > start and words[end - 1] in _FILLER:
+            end -= 1
+        return " ".join(words[start:end])
+
+    def stats(self) -> Dict:
+        with self._lock:
+            counts = dict(self._counts)
+        fired = counts["greeting"] + counts["farewell"]
+        counts["fast_path_rate"] = round(fired / counts["checked"], 3) if counts["checked"] else 0.0
+        return counts
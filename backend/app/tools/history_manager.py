@@ -0,0 +1,108 @@
+import re
+from typing import List, Optional, Tuple
+
+_SUMMARY_RE = re.compile(r"<summary>(.*?)(?:</summary>|$)", re.DOTALL | re.IGNORECASE)
+_TAG_RE = re.compile(r"</?[a-z]+>", re.IGNORECASE)
+
+SUMMARY_PARAMS = {
+    "decoding_method": "greedy",
+    "max_new_tokens": 200,
+    "temperature": 0.0,
+    "stop_sequences": ["\n\n"]
+}
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token for English with the Llama tokenizer; close enough for budgeting
+    return len(text) // 4 + 1
+
+
+def summary_section(response: str, max_chars: int = 600) -> str:
+    # The <summary> part of a tagged response, or a tag-stripped prefix otherwise
+    match = _SUMMARY_RE.search(response)
+    text = match.group(1) if match else _TAG_RE.sub(" ", response)
+    text = " ".join(text.split())
+    return text[:max_chars]
+
+
+class HistoryManager:
+    # Builds the conversation context given to the agents under a token budget:
+    # the last recent_turns turns are kept verbatim and everything older lives
+    # in a rolling summary stored with the session. compact() folds each turn
+    # into that summary exactly once, when it leaves the recent window or is
+    # evicted by the store's caps, so build() itself never calls the model.
+    def __init__(self, token_budget: int = 1500, recent_turns: int = 2, model=None,
+                 summary_tokens: int = 200):
+        self.token_budget = token_budget
+        self.recent_turns = recent_turns
+        self.model = model
+        self.summary_tokens = summary_tokens
+
+    def build(self, history: List[Tuple[str, str]], user_query: str, summary: str = "") -> str:
+        if not history and not summary:
+            return user_query
+        # Turns beyond the recent window not yet folded by compact() start compacted
+        split = max(len(history) - self.recent_turns, 0)
+        recent = [[q, r, i < split] for i, (q, r) in enumerate(history)]
+
+        def render() -> str:
+            lines = []
+            if summary:
+                lines.append(f"Summary of earlier conversation: {summary}")
+            for past_user, past_bot, compact in recent:
+                lines.append(f"User: {past_user}")
+                lines.append(f"Bot: {summary_section(past_bot) if compact else past_bot}")
+            lines.append(f"User: {user_query}")
+            return "\n".join(lines)
+
+        combined = render()
+        # Over budget: shrink recent responses to their <summary> section, oldest first,
+        # then drop recent turns altogether before ever touching the current query
+        for turn in recent:
+            if estimate_tokens(combined) <= self.token_budget:
+                break
+            turn[2] = True
+            combined = render()
+        while recent and estimate_tokens(combined) > self.token_budget:
+            recent.pop(0)
+            combined = render()
+        if summary and estimate_tokens(combined) > self.token_budget:
+            room = 4 * (self.token_budget - estimate_tokens(user_query))
+            summary = summary[-room:] if room > 0 else ""
+            combined = render()
+        return combined
+
+    def compact(self, store, session_id: str, dropped: Optional[List[Tuple[str, str]]] = None) -> None:
+        # Folds the turns the store just evicted (dropped, oldest first) and those
+        # that fell out of the recent window into the session's summary
+        history, _, summary = store.snapshot(session_id)
+        overflow = history[:max(len(history) - self.recent_turns, 0)]
+        turns = list(dropped or []) + overflow
+        if not turns:
+            return
+        for user_query, response in turns:
+            summary = self._fold(summary, user_query, response)
+        store.fold(session_id, overflow, summary)
+
+    def _fold(self, summary: str, user_query: str, response: str) -> str:
+        conclusion = summary_section(response, max_chars=400)
+        if self.model is not None:
+            prompt = (
+                "Update the running summary of a climate risk advisory conversation with the new turn. "
+                "Keep locations, hazards and recommendations; answer in at most five sentences.\n\n"
+                f"Current summary: {summary or '(none)'}\n"
+                f"User: {user_query}\n"
+                f"Advisor conclusion: {conclusion}\n\n"
+                "Updated summary:"
+            )
+            try:
+                params = dict(SUMMARY_PARAMS, max_new_tokens=self.summary_tokens)
+                updated = self.model.generate_text(prompt=prompt, params=params).strip()
+                if updated:
+                    return updated
+            except Exception:
+                pass
+        # Extractive fallback: one line per turn, keeping the most recent lines in budget
+        line = f"User asked: {user_query[:200]} Advisor concluded: {conclusion}"
+        updated = f"{summary}\n{line}" if summary else line
+        return updated[-4 * self.summary_tokens * 2:]
@@ -1,12 +1,80 @@
+import threading
+from typing import Dict, Optional
+
+from .gazetteer import Gazetteer
+
+# The answer is a single place name; without these the model's default
+# 800-token budget applies to what is often the router's fallback call
+LOCATION_PARAMS = {
+    "decoding_method": "greedy",
+    "max_new_tokens": 16,
+    "temperature": 0.0,
+    "stop_sequences": ["\n"]
+}
+
+
 class LocationExtractor:
-    def __init__(self, model):
+    def __init__(self, model, gazetteer: Optional[Gazetteer] = None, min_confidence: float = 0.75):
         self.model = model
+        self.gazetteer = gazetteer
+        self.min_confidence = min_confidence
+        self._lock = threading.Lock()
+        self._counts = {"gazetteer": 0, "llm": 0}
+
+    def locate(self, text: str) -> Optional[Dict]:
+        # Confident offline gazetteer match, or None when the LLM should decide
+        if self.gazetteer is None:
+            return None
+        match = self.gazetteer.locate(text)
+        if match is None or match["confidence"] < self.min_confidence:
+            return None
+        self._count("gazetteer")
+        return match
+
+    def canonicalize(self, location: str) -> str:
+        # Map a place name returned by the LLM onto its gazetteer key so downstream
+        # caches see one spelling per place
+        if not location or self.gazetteer is None or location.strip().lower() == "global":
+            return location
+        match = self.gazetteer.locate(location)
+        if match is None or match["confidence"] < self.min_confidence:
+            return location
+        return match["location"]
 
     def extract_location(self, text: str) -> str:
-        prompt = (
+        match = self.locate(text)
+        if match is not None:
+            return match["location"]
+        response = self.model.generate_text(prompt=self._prompt(text), params=LOCATION_PARAMS).strip()
+        return self.canonicalize(response) or "Global"
+
+    async def aextract_location(self, text: str) -> str:
+        match = self.locate(text)
+        if match is not None:
+            return match["location"]
+        response = (await self.model.agenerate_text(prompt=self._prompt(text), params=LOCATION_PARAMS)).strip()
+        return self.canonicalize(response) or "Global"
+
+    @staticmethod
+    def _prompt(text: str) -> str:
+        return (
             "Extract the location from this query. "
             "If no specific location is mentioned, respond with 'Global'.\n\n"
             f"Query: {text}\n\nLocation:"
         )
-        response = self.model.generate_text(prompt).strip()
-        return response or "Global"
+
+    def record_llm(self) -> None:
+        # Called once per query whose location the LLM resolved (routing call or
+        # its extraction fallback), so gazetteer_rate counts each query once
+        self._count("llm")
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self._counts[key] += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            counts = dict(self._counts)
+        total = counts["gazetteer"] + counts["llm"]
+        counts["gazetteer_rate"] = round(counts["gazetteer"] / total, 3) if total else 0.0
+        return counts
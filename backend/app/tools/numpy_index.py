@@ -0,0 +1,152 @@
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Files written by vector_store/export_numpy_index.py
+VECTORS_NAME = "vectors.npy"
+META_NAME = "meta.json"
+# Per-row dequantization scales of an int8 matrix, and the optional float32
+# copy used to rescore candidates found in a float16/int8 matrix
+SCALES_NAME = "scales.npy"
+RESCORE_NAME = "vectors_f32.npy"
+
+
+def quantize_int8(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # Symmetric per-vector quantization: row ~= q * scale with q in [-127, 127]
+    vectors = np.asarray(vectors, dtype=np.float32)
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    q = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return q, scales.astype(np.float32)
+
+
+class NumpyIndex:
+    # Brute-force nearest-neighbour search over a memory-mapped (n, dim) matrix of
+    # unit-normalized embeddings (float32, float16, or int8 with per-row scales)
+    # with a JSON sidecar of ids, texts and metadata. The matrix is opened
+    # read-only with mmap, so every worker process reads the same pages from the
+    # OS page cache. When a reduced-precision matrix ships with a float32 copy,
+    # the top rescore_factor * k candidates are rescored exactly from that copy;
+    # only the candidate rows of it are ever read.
+    #
+    # query() follows the Chroma collection API (query_embeddings, n_results,
+    # where -> ids/documents/metadatas/distances), so BatchRetriever and
+    # UnifiedRetriever work on top of it unchanged.
+    def __init__(self, path: str, embeddings=None, mmap: bool = True, block_rows: int = 16384,
+                 rescore_factor: int = 4):
+        self.path = path
+        self.embeddings = embeddings
+        self.block_rows = block_rows
+        self.rescore_factor = rescore_factor
+        mmap_mode = "r" if mmap else None
+        self.vectors = np.load(os.path.join(path, VECTORS_NAME), mmap_mode=mmap_mode)
+        self.scales = None
+        if self.vectors.dtype == np.int8:
+            self.scales = np.load(os.path.join(path, SCALES_NAME))
+        self.full = None
+        rescore_path = os.path.join(path, RESCORE_NAME)
+        if self.vectors.dtype != np.float32 and os.path.exists(rescore_path):
+            self.full = np.load(rescore_path, mmap_mode=mmap_mode)
+        with open(os.path.join(path, META_NAME), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.ids: List[str] = meta["ids"]
+        self.documents: List[str] = meta["documents"]
+        self.metadatas: List[Dict] = meta["metadatas"]
+        if len(self.ids) != self.vectors.shape[0]:
+            raise ValueError(f"{path}: {len(self.ids)} metadata rows for {self.vectors.shape[0]} vectors")
+        self._masks: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return self.vectors.shape[0]
+
+    @property
+    def nbytes(self) -> int:
+        # Bytes scanned per search (the float32 rescoring copy is only sampled)
+        return self.vectors.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def scores(self, queries: np.ndarray) -> np.ndarray:
+        # (q, n) cosine similarities, one block of rows at a time so a float16 or
+        # int8 matrix is only ever upcast block_rows rows at once
+        out = np.empty((queries.shape[0], len(self)), dtype=np.float32)
+        for start in range(0, len(self), self.block_rows):
+            block = np.asarray(self.vectors[start:start + self.block_rows], dtype=np.float32)
+            stop = start + block.shape[0]
+            out[:, start:stop] = queries @ block.T
+            if self.scales is not None:
+                out[:, start:stop] *= self.scales[start:stop]
+        return out
+
+    def search(self, query_embeddings, n_results: int,
+               where: Optional[Dict] = None) -> Tuple[np.ndarray, np.ndarray]:
+        # (row indices, similarities) of the n_results best rows per query, best first
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries = queries / np.where(norms == 0, 1.0, norms)
+        scores = self.scores(queries)
+        candidates = len(self)
+        if where:
+            mask = self._mask(where)
+            scores[:, ~mask] = -np.inf
+            candidates = int(mask.sum())
+        n = min(n_results, candidates)
+        if n <= 0:
+            empty = np.empty((queries.shape[0], 0), dtype=np.int64)
+            return empty, empty.astype(np.float32)
+        if self.full is None:
+            return self._top(scores, n)
+
+        # Approximate shortlist from the compact matrix, exact float32 order within it
+        shortlist, _ = self._top(scores, min(n * self.rescore_factor, candidates))
+        exact = np.empty(shortlist.shape, dtype=np.float32)
+        for i, rows in enumerate(shortlist):
+            # Read the float32 rows in file order, then put the scores back in place
+            order = np.argsort(rows)
+            exact[i, order] = np.asarray(self.full[rows[order]], dtype=np.float32) @ queries[i]
+        top, top_scores = self._top(exact, n)
+        return np.take_along_axis(shortlist, top, axis=1), top_scores
+
+    @staticmethod
+    def _top(scores: np.ndarray, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        top = np.argpartition(-scores, n - 1, axis=1)[:, :n]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+    def query(self, query_embeddings, n_results: int = 4, include=None,
+              where: Optional[Dict] = None) -> Dict:
+        rows, scores = self.search(query_embeddings, n_results, where)
+        return {
+            "ids": [[self.ids[i] for i in r] for r in rows],
+            "documents": [[self.documents[i] for i in r] for r in rows],
+            "metadatas": [[self.metadatas[i] for i in r] for r in rows],
+            "distances": (1.0 - scores).tolist()
+        }
+
+    def _mask(self, where: Dict) -> np.ndarray:
+        # Supports the filters the app uses: {"field": value}, {"field": {"$in": [...]}}
+        # and {"$and": [...]} of those; masks are cached per filter
+        key = json.dumps(where, sort_keys=True)
+        mask = self._masks.get(key)
+        if mask is None:
+            mask = np.fromiter((self._matches(m or {}, where) for m in self.metadatas),
+                               dtype=bool, count=len(self))
+            self._masks[key] = mask
+        return mask
+
+    def _matches(self, metadata: Dict, where: Dict) -> bool:
+        for field, condition in where.items():
+            if field == "$and":
+                if not all(self._matches(metadata, sub) for sub in condition):
+                    return False
+            elif isinstance(condition, dict):
+                if set(condition) - {"$eq", "$in"}:
+                    raise ValueError(f"Unsupported filter for NumpyIndex: {condition}")
+                if "$eq" in condition and metadata.get(field) != condition["$eq"]:
+                    return False
+                if "$in" in condition and metadata.get(field) not in condition["$in"]:
+                    return False
+            elif metadata.get(field) != condition:
+                return False
+        return True
@@ -0,0 +1,94 @@
+import re
+from typing import Optional, Tuple
+
+INTENTS = ("GREETING", "FAREWELL", "OTHER")
+
+ROUTING_PARAMS = {
+    "decoding_method": "greedy",
+    "max_new_tokens": 24,
+    "temperature": 0.0,
+    "stop_sequences": ["\n\n"]
+}
+
+_INTENT_RE = re.compile(r"INTENT\s*:\s*([A-Za-z]+)", re.IGNORECASE)
+_LOCATION_RE = re.compile(r"LOCATION\s*:\s*([^\n]*)", re.IGNORECASE)
+_NO_LOCATION = {"", "none", "null", "n/a", "na", "unknown", "not specified", "no location", "global"}
+
+
+class QueryRouter:
+    # Single LLM call that returns both the greeting/farewell classification and
+    # the location, replacing the separate classification and extraction calls
+    def __init__(self, model, location_extractor=None):
+        self.model = model
+        self.location_extractor = location_extractor
+
+    def route(self, text: str) -> Tuple[str, str]:
+        try:
+            raw = self.model.generate_text(prompt=self._prompt(text), params=ROUTING_PARAMS)
+        except Exception:
+            return "OTHER", self._fallback_location(text)
+
+        parsed = self.parse("INTENT:" + (raw or ""))
+        if parsed is None:
+            return "OTHER", self._fallback_location(text)
+        return parsed
+
+    async def aroute(self, text: str) -> Tuple[str, str]:
+        try:
+            raw = await self.model.agenerate_text(prompt=self._prompt(text), params=ROUTING_PARAMS)
+        except Exception:
+            return "OTHER", await self._afallback_location(text)
+
+        parsed = self.parse("INTENT:" + (raw or ""))
+        if parsed is None:
+            return "OTHER", await self._afallback_location(text)
+        return parsed
+
+    @staticmethod
+    def _prompt(text: str) -> str:
+        return (
+            "Classify the user input and extract the location it mentions.\n"
+            "INTENT is GREETING if it is only a casual greeting (e.g., 'hello', 'hi'), "
+            "FAREWELL if it is only a farewell (e.g., 'bye', 'goodbye'), otherwise OTHER.\n"
+            "LOCATION is the place the user asks about, or Global if none is mentioned.\n"
+            "Answer with exactly two lines and nothing else:\n"
+            "INTENT: <GREETING|FAREWELL|OTHER>\n"
+            "LOCATION: <place or Global>\n\n"
+            f"User: {text}\n\n"
+            "INTENT:"
+        )
+
+    @staticmethod
+    def parse(raw: str) -> Optional[Tuple[str, str]]:
+        intent_match = _INTENT_RE.search(raw)
+        if not intent_match or intent_match.group(1).upper() not in INTENTS:
+            return None
+        intent = intent_match.group(1).upper()
+        location_match = _LOCATION_RE.search(raw)
+        if not location_match:
+            # A greeting or farewell needs no location; anything else is malformed
+            return (intent, "Global") if intent != "OTHER" else None
+        return intent, QueryRouter.clean_location(location_match.group(1))
+
+    @staticmethod
+    def clean_location(location: str) -> str:
+        location = location.strip().strip("\"'`<>.[]").strip()
+        if location.lower() in _NO_LOCATION or len(location) > 80:
+            return "Global"
+        return location
+
+    def _fallback_location(self, text: str) -> str:
+        if self.location_extractor is None:
+            return "Global"
+        try:
+            return self.location_extractor.extract_location(text).strip() or "Global"
+        except Exception:
+            return "Global"
+
+    async def _afallback_location(self, text: str) -> str:
+        if self.location_extractor is None:
+            return "Global"
+        try:
+            return (await self.location_extractor.aextract_location(text)).strip() or "Global"
+        except Exception:
+            return "Global"
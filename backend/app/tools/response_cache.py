@@ -0,0 +1,148 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .gazetteer import fold, tokenize
+from .search_cache import normalize_location
+
+# Words that change the phrasing of a question but not what it asks for
+_STOP_WORDS = {
+    "a", "an", "the", "of", "in", "on", "at", "for", "to", "and", "or", "is", "are", "be",
+    "our", "my", "we", "us", "me", "i", "you", "your", "it", "its", "this", "that", "there",
+    "what", "which", "how", "will", "would", "could", "should", "can", "do", "does", "please",
+    "tell", "about", "with", "from", "by", "any", "some", "give", "show"
+}
+
+
+def question_intent(user_query: str, location: str = "") -> str:
+    # Order-insensitive set of content words, minus the location itself, so
+    # "What are the flood risks in Houston?" and "Houston flood risks" match
+    location_tokens = set(tokenize(fold(location)))
+    words = {
+        w for w in tokenize(fold(user_query))
+        if w not in _STOP_WORDS and w not in location_tokens
+    }
+    return " ".join(sorted(words))
+
+
+def context_hash(docs: Iterable) -> str:
+    # Identity of the retrieved chunks; a re-ingest that changes what a location
+    # retrieves changes the key even before the store stamp is noticed
+    digest = hashlib.sha256()
+    for doc in docs:
+        chunk_id = getattr(doc, "id", None)
+        if not chunk_id:
+            chunk_id = f"{doc.metadata.get('source', '')}:{doc.metadata.get('start_index', '')}"
+        digest.update(str(chunk_id).encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()[:16]
+
+
+class FileWatch:
+    # Cheap change detection for a few files: changed() reports whether any
+    # mtime/size differs from the last check, at most one stat() round per interval
+    def __init__(self, paths: Optional[List[str]] = None, check_interval: float = 5.0):
+        self.paths = list(paths or [])
+        self.check_interval = check_interval
+        self._stamp = self._read_stamp()
+        self._checked = time.monotonic()
+
+    def changed(self) -> bool:
+        now = time.monotonic()
+        if not self.paths or now - self._checked < self.check_interval:
+            return False
+        self._checked = now
+        stamp = self._read_stamp()
+        if stamp == self._stamp:
+            return False
+        self._stamp = stamp
+        return True
+
+    def _read_stamp(self) -> Tuple:
+        stamp = []
+        for path in self.paths:
+            try:
+                st = os.stat(path)
+                stamp.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                stamp.append(None)
+        return tuple(stamp)
+
+
+class ResponseCache:
+    # Complete tagged responses keyed by (location, question intent, retrieved
+    # context). Only history-free queries are cached, since earlier turns shape
+    # the answer. Entries are dropped wholesale when any watched file (the vector
+    # stores' ingest manifests) changes, or on invalidate().
+    def __init__(self, max_entries: int = 512, ttl: float = 24 * 60 * 60,
+                 watch_paths: Optional[List[str]] = None, check_interval: float = 5.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.watch = FileWatch(watch_paths, check_interval)
+        self._entries: "OrderedDict[Tuple[str, str, str], Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def key(self, location: str, user_query: str, docs: Iterable) -> Tuple[str, str, str]:
+        return normalize_location(location), question_intent(user_query, location), context_hash(docs)
+
+    def get(self, key: Tuple[str, str, str]) -> Optional[str]:
+        if self.watch.changed():
+            self.invalidate()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, response = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                self.expired += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return response
+
+    def put(self, key: Tuple[str, str, str], response: str) -> None:
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, location: Optional[str] = None) -> int:
+        # Drops every entry, or only those for one location; returns how many
+        with self._lock:
+            if location is None:
+                removed = len(self._entries)
+                self._entries.clear()
+            else:
+                target = normalize_location(location)
+                stale = [k for k in self._entries if k[0] == target]
+                for k in stale:
+                    del self._entries[k]
+                removed = len(stale)
+            self.invalidations += 1
+            return removed
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+            }
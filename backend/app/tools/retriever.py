@@ -0,0 +1,81 @@
+from typing import Dict, List, Optional
+
+from langchain_core.documents import Document
+
+
+class BatchRetriever:
+    # Wraps a Chroma store so several queries share one embedding pass and one
+    # vector search instead of one retriever.invoke() round trip per query.
+    # A NumpyIndex can stand in for the store: it is its own collection.
+    def __init__(self, vectorstore, k: int = 4, where: Optional[Dict] = None):
+        self.vectorstore = vectorstore
+        self.collection = getattr(vectorstore, "_collection", vectorstore)
+        self.k = k
+        self.where = where
+
+    def invoke(self, query: str) -> List[Document]:
+        return self.batch_invoke([query], k=self.k)[0]
+
+    def batch_invoke(self, queries: List[str], k: int = 2) -> List[List[Document]]:
+        if not queries:
+            return []
+        embeddings = self.vectorstore.embeddings.embed_documents(queries)
+        return self.search_embeddings(embeddings, k)
+
+    def search_embeddings(self, embeddings: List[List[float]], k: int = 2) -> List[List[Document]]:
+        # Over-fetch so a chunk already claimed by an earlier query can be replaced
+        # by that query's next best match after de-duplication
+        n_results = k * len(embeddings)
+        query_kwargs = {
+            "query_embeddings": embeddings,
+            "n_results": n_results,
+            "include": ["documents", "metadatas"]
+        }
+        if self.where:
+            query_kwargs["where"] = self.where
+        raw = self.collection.query(**query_kwargs)
+
+        seen = set()
+        per_query = []
+        for ids, texts, metadatas in zip(raw["ids"], raw["documents"], raw["metadatas"]):
+            docs = []
+            for chunk_id, text, metadata in zip(ids, texts, metadatas):
+                if chunk_id in seen:
+                    continue
+                seen.add(chunk_id)
+                docs.append(Document(page_content=text, metadata=metadata or {}, id=chunk_id))
+                if len(docs) == k:
+                    break
+            per_query.append(docs)
+        return per_query
+
+
+class UnifiedRetriever:
+    # One store (Chroma or NumpyIndex) holding every corpus, each chunk tagged
+    # with a "corpus" metadata field at ingestion. corpus() gives a BatchRetriever
+    # confined to one corpus; multi_invoke() embeds the queries for several
+    # corpora in one pass and runs one filtered search per corpus against the
+    # shared index.
+    def __init__(self, vectorstore, field: str = "corpus"):
+        self.vectorstore = vectorstore
+        self.field = field
+        self._views: Dict[str, BatchRetriever] = {}
+
+    def corpus(self, name: str) -> BatchRetriever:
+        if name not in self._views:
+            self._views[name] = BatchRetriever(self.vectorstore, where={self.field: name})
+        return self._views[name]
+
+    def multi_invoke(self, queries: Dict[str, List[str]], k: int = 2) -> Dict[str, List[List[Document]]]:
+        names = [name for name, texts in queries.items() if texts]
+        flat = [text for name in names for text in queries[name]]
+        results: Dict[str, List[List[Document]]] = {name: [] for name in queries}
+        if not flat:
+            return results
+        embeddings = self.vectorstore.embeddings.embed_documents(flat)
+        offset = 0
+        for name in names:
+            count = len(queries[name])
+            results[name] = self.corpus(name).search_embeddings(embeddings[offset:offset + count], k)
+            offset += count
+        return results
@@ -0,0 +1,141 @@
+import atexit
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+# Seconds a cached result stays fresh, per Serper query type
+DEFAULT_TTLS = {
+    "weather": 15 * 60,
+    "news": 2 * 60 * 60,
+    "risks": 24 * 60 * 60,
+    "general": 24 * 60 * 60,
+    "projections": 7 * 24 * 60 * 60
+}
+
+
+def normalize_location(location: str) -> str:
+    return " ".join(location.lower().split())
+
+
+class SearchCache:
+    def __init__(self, max_entries: int = 512, ttls: Optional[Dict[str, float]] = None,
+                 path: Optional[str] = None, flush_interval: float = 30.0):
+        self.max_entries = max_entries
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.path = path
+        # (location, query_type) -> (expires_at, result), oldest first
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Writes to the file happen at most once per flush_interval on a timer
+        # thread (and at exit), never under the lock lookups need
+        self.flush_interval = flush_interval
+        self._flush_lock = threading.Lock()
+        self._flush_timer: Optional[threading.Timer] = None
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        if self.path:
+            self._load()
+            atexit.register(self.flush)
+
+    def get(self, location: str, query_type: str) -> Optional[Dict]:
+        key = (normalize_location(location), query_type)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, result = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                self.expired += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, location: str, query_type: str, result: Dict) -> None:
+        key = (normalize_location(location), query_type)
+        ttl = self.ttls.get(query_type, self.ttls["general"])
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        self._mark_dirty()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+        self._mark_dirty()
+
+    def flush(self) -> None:
+        # Snapshot the rows under the lock, serialize and write outside it
+        if not self.path:
+            return
+        with self._flush_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                self._dirty = False
+                self._flush_timer = None
+                rows = [[loc, qtype, exp, res] for (loc, qtype), (exp, res) in self._entries.items()]
+            self._save(rows)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+            }
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                rows = json.load(f)
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        for location, query_type, expires_at, result in rows:
+            if expires_at > now:
+                self._entries[(location, query_type)] = (expires_at, result)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _mark_dirty(self) -> None:
+        if not self.path:
+            return
+        with self._lock:
+            self._dirty = True
+            if self._flush_timer is not None:
+                return
+            self._flush_timer = threading.Timer(self.flush_interval, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def _save(self, rows) -> None:
+        # Write to a temp file and swap so a crash never leaves a truncated cache;
+        # the temp name is per process so workers sharing the path never write
+        # into the same file (flush already serializes writers within a process)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(rows, f)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass
@@ -1,17 +1,93 @@
+import threading
 import requests
-from typing import Dict
+from concurrent.futures import ThreadPoolExecutor, wait
+from requests.adapters import HTTPAdapter
+from typing import Dict, Iterable, Optional
+from urllib3.util.retry import Retry
 
+from .search_cache import SearchCache
 from ..settings.config import Config
 
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_shared_session() -> requests.Session:
+    # One keep-alive pool per process so every chatbot request reuses the same
+    # TLS connections to google.serper.dev instead of handshaking per query
+    global _session
+    with _session_lock:
+        if _session is None:
+            # Only connection failures and 429/5xx answers are retried: a read
+            # timeout retried on POST would multiply SERPER_TIMEOUT far past the
+            # search_many deadline while holding a fan-out thread, and a long
+            # Retry-After would do the same
+            retry = Retry(
+                total=Config.SERPER_MAX_RETRIES,
+                read=0,
+                respect_retry_after_header=False,
+                backoff_factor=Config.SERPER_BACKOFF,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=frozenset(["POST"]),
+                raise_on_status=False
+            )
+            adapter = HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=Config.SERPER_POOL_SIZE,
+                max_retries=retry
+            )
+            session = requests.Session()
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
+
+def connection_stats() -> Dict:
+    # Requests sent vs. TCP/TLS connections opened across the shared pool
+    session = get_shared_session()
+    requests_sent = connections_opened = 0
+    for adapter in session.adapters.values():
+        pools = adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            requests_sent += pool.num_requests
+            connections_opened += pool.num_connections
+    return {
+        "requests": requests_sent,
+        "connections_opened": connections_opened,
+        "connections_reused": max(requests_sent - connections_opened, 0)
+    }
+
+
 class SerperSearchService:
-    def __init__(self):
+    def __init__(self, max_workers: Optional[int] = None, session: Optional[requests.Session] = None,
+                 cache: Optional[SearchCache] = None):
         self.api_key = Config.SERPER_API_KEY
+        self.session = session or get_shared_session()
+        self.cache = cache or SearchCache(
+            max_entries=Config.SEARCH_CACHE_SIZE,
+            path=Config.SEARCH_CACHE_PATH or None
+        )
         self.base_url = "https://google.serper.dev/search"
+        self.timeout = Config.SERPER_TIMEOUT
+        self.deadline = Config.SERPER_DEADLINE
+        # Workers for the concurrent fan-out in search_many; queueing here would
+        # count against the deadline, so there is one per pooled connection
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or Config.SERPER_WORKERS, thread_name_prefix="serper"
+        )
 
-    def search_climate_data(self, location: str, query_type: str = "general") -> Dict:
+    def search_climate_data(self, location: str, query_type: str = "general",
+                            timeout: Optional[float] = None) -> Dict:
         if not self.api_key:
             return {"error": "Serper API key not configured"}
 
+        cached = self.cache.get(location, query_type)
+        if cached is not None:
+            return cached
+
         # If location == "Global", omit the location token from each query
         if location.strip().lower() == "global":
             queries = {
@@ -35,14 +111,42 @@ class SerperSearchService:
         payload = {'q': q, 'num': 8, 'gl': 'us'}
 
         try:
-            resp = requests.post(self.base_url, headers=headers, json=payload, timeout=10)
+            resp = self.session.post(self.base_url, headers=headers, json=payload,
+                                     timeout=self.timeout if timeout is None else timeout)
             resp.raise_for_status()
             data = resp.json()
-            return {
+            result = {
                 "success": True,
                 "results": data.get("organic", []),
                 "news": data.get("news", []),
                 "query": q
             }
+            self.cache.put(location, query_type, result)
+            return result
         except requests.exceptions.RequestException as e:
             return {"success": False, "error": f"Search failed: {str(e)}"}
+
+    def search_many(self, location: str, query_types: Iterable[str],
+                    deadline: Optional[float] = None) -> Dict[str, Dict]:
+        # Fan the query types out concurrently under one overall deadline; types still
+        # running when it expires are reported as failed so callers get every key back
+        deadline = self.deadline if deadline is None else deadline
+        # No single attempt may outlive the deadline it is abandoned at
+        timeout = min(self.timeout, deadline)
+        futures = {
+            qtype: self._executor.submit(self.search_climate_data, location, qtype, timeout)
+            for qtype in query_types
+        }
+        wait(futures.values(), timeout=deadline)
+
+        results = {}
+        for qtype, future in futures.items():
+            if future.done():
+                try:
+                    results[qtype] = future.result()
+                except Exception as e:
+                    results[qtype] = {"success": False, "error": f"Search failed: {str(e)}"}
+            else:
+                future.cancel()
+                results[qtype] = {"success": False, "error": f"Search timed out after {deadline:.0f}s"}
+        return results
@@ -0,0 +1,136 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .gazetteer import fold, tokenize
+from .response_cache import FileWatch
+from .search_cache import normalize_location
+
+
+def normalize_query(user_query: str, location: str = "") -> str:
+    # Accent-folded, punctuation-free text without the location's own words;
+    # the index is already partitioned by location, so leaving them in would only
+    # pull unrelated questions about the same place closer together
+    location_tokens = set(tokenize(fold(location)))
+    return " ".join(w for w in tokenize(fold(user_query)) if w not in location_tokens)
+
+
+class _LocationIndex:
+    # Unit-normalized query vectors and their answers for one location
+    def __init__(self, dim: int, capacity: int):
+        self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self.responses: List[Optional[str]] = [None] * capacity
+        self.queries: List[str] = [""] * capacity
+        self.expires = np.zeros(capacity, dtype=np.float64)
+        self.size = 0
+        self.next = 0
+
+    def add(self, vector: np.ndarray, query: str, response: str, expires_at: float) -> None:
+        # Ring buffer: once full, the oldest answer is overwritten
+        slot = self.next
+        self.vectors[slot] = vector
+        self.queries[slot] = query
+        self.responses[slot] = response
+        self.expires[slot] = expires_at
+        self.next = (slot + 1) % len(self.responses)
+        self.size = min(self.size + 1, len(self.responses))
+
+    def best(self, vector: np.ndarray, now: float):
+        if self.size == 0:
+            return None
+        scores = self.vectors[:self.size] @ vector
+        scores[self.expires[:self.size] <= now] = -np.inf
+        slot = int(np.argmax(scores))
+        if np.isneginf(scores[slot]):
+            return None
+        return float(scores[slot]), slot
+
+
+class SemanticCache:
+    # Tagged responses for history-free questions, found by cosine similarity
+    # between query embeddings within the same location. Each location keeps a
+    # small ring of recent answers searched exactly with one matrix-vector
+    # product; locations themselves are evicted least-recently-used.
+    def __init__(self, embeddings, threshold: float = 0.9, per_location: int = 64,
+                 max_locations: int = 512, ttl: float = 24 * 60 * 60,
+                 watch_paths: Optional[List[str]] = None, check_interval: float = 5.0):
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.per_location = per_location
+        self.max_locations = max_locations
+        self.ttl = ttl
+        self.watch = FileWatch(watch_paths, check_interval)
+        self._indexes: "OrderedDict[str, _LocationIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.near_misses = 0
+        self.invalidations = 0
+
+    def embed(self, user_query: str, location: str) -> np.ndarray:
+        vector = np.asarray(self.embeddings.embed_query(normalize_query(user_query, location)), dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else vector
+
+    def get(self, location: str, vector: np.ndarray) -> Optional[Dict]:
+        # {"response", "score", "matched_query"} for the closest answer at or above
+        # the threshold, or None
+        if self.watch.changed():
+            self.invalidate()
+        key = normalize_location(location)
+        with self._lock:
+            index = self._indexes.get(key)
+            found = index.best(vector, time.time()) if index is not None else None
+            if found is None or found[0] < self.threshold:
+                self.misses += 1
+                if found is not None and found[0] >= self.threshold - 0.1:
+                    self.near_misses += 1
+                return None
+            score, slot = found
+            self._indexes.move_to_end(key)
+            self.hits += 1
+            return {
+                "response": index.responses[slot],
+                "score": round(score, 4),
+                "matched_query": index.queries[slot]
+            }
+
+    def put(self, location: str, vector: np.ndarray, user_query: str, response: str) -> None:
+        key = normalize_location(location)
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is None:
+                index = _LocationIndex(vector.shape[0], self.per_location)
+                self._indexes[key] = index
+            self._indexes.move_to_end(key)
+            index.add(vector, user_query, response, time.time() + self.ttl)
+            while len(self._indexes) > self.max_locations:
+                self._indexes.popitem(last=False)
+
+    def invalidate(self, location: Optional[str] = None) -> int:
+        with self._lock:
+            if location is None:
+                removed = sum(index.size for index in self._indexes.values())
+                self._indexes.clear()
+            else:
+                index = self._indexes.pop(normalize_location(location), None)
+                removed = index.size if index is not None else 0
+            self.invalidations += 1
+            return removed
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "locations": len(self._indexes),
+                "entries": sum(index.size for index in self._indexes.values()),
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "near_misses": self.near_misses,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+            }
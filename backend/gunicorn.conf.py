@@ -0,0 +1,63 @@
+import gc
+import multiprocessing
+import os
+
+from dotenv import load_dotenv
+
+# Production serving: gunicorn -c gunicorn.conf.py main:app
+# With preload_app the master imports main:app once and loads the MiniLM
+# weights; forked workers share those pages copy-on-write. Each worker then
+# builds its own ClimateRiskChatbot (watsonx client, Chroma stores, HTTP pools)
+# after fork, as STARTUP_MODE says. Threads let one worker overlap several slow
+# LLM calls.
+
+# The checks below read the same .env as app.settings.config
+load_dotenv(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env"))
+bind = os.getenv("BIND", "0.0.0.0:5000")
+# LLM_MAX_CONCURRENCY and LLM_BURST are deployment totals split across the
+# workers (see get_llm_scheduler), so each worker needs at least one of each
+llm_budget = min(int(os.getenv("LLM_MAX_CONCURRENCY", "8")), int(os.getenv("LLM_BURST", "8")))
+workers = int(os.getenv("WEB_WORKERS", str(max(1, min(multiprocessing.cpu_count() // 2, llm_budget)))))
+if workers > llm_budget:
+    raise RuntimeError(
+        f"WEB_WORKERS={workers} exceeds the LLM concurrency/burst budget ({llm_budget}); "
+        "raise LLM_MAX_CONCURRENCY and LLM_BURST or run fewer workers"
+    )
+# Config reads the worker count (conversation backend, per-worker LLM budget)
+os.environ["WEB_WORKERS"] = str(workers)
+# Session history, rolling summaries and each session's last location must be
+# visible to whichever worker takes the next request; the memory store is not
+if workers > 1 and os.getenv("CONVERSATION_BACKEND", "sqlite") == "memory":
+    raise RuntimeError(
+        "CONVERSATION_BACKEND=memory keeps sessions per process; use sqlite or WEB_WORKERS=1"
+    )
+worker_class = "gthread"
+threads = int(os.getenv("WEB_THREADS", "8"))
+# A chat turn makes several long generations; keep workers from being killed mid-answer
+timeout = int(os.getenv("WEB_TIMEOUT", "300"))
+graceful_timeout = 30
+keepalive = 5
+preload_app = os.getenv("WEB_PRELOAD", "1") == "1"
+accesslog = "-"
+errorlog = "-"
+
+
+# Tokenizer thread pools do not survive fork; keep them off in the workers
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+
+
+def pre_fork(server, worker):
+    # Move everything loaded so far into the permanent generation so the
+    # workers' garbage collector never writes to (and un-shares) those pages
+    gc.freeze()
+
+
+def post_worker_init(worker):
+    from main import provider
+    from app.settings.config import Config
+
+    # A failed build must not raise here: the worker would die and be respawned
+    # in a loop. It stays up, reports the error on /api/ready and retries.
+    if not provider.warm(Config.STARTUP_MODE):
+        worker.log.error("Worker %s could not build the chatbot: %s", worker.pid, provider.status()["error"])
+    worker.log.info("Worker %s started (chatbot %s)", worker.pid, provider.status()["state"])
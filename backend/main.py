@@ -1,12 +1,24 @@
+import os
+
 from flask import Flask
 from flask_cors import CORS
 
+from app.chatbot import get_shared_embeddings
+from app.provider import ChatbotProvider
 from app.routes import routes
+from app.settings.config import Config
 
 app = Flask(__name__)
 CORS(app)
 
-routes(app)
+provider = ChatbotProvider()
+routes(app, provider)
+
+if Config.PRELOAD_EMBEDDINGS:
+    # Under gunicorn with preload_app this runs once in the master, before fork
+    get_shared_embeddings()
 
 if __name__ == "__main__":
-    app.run(debug=True)
+    # Development server only; use gunicorn -c gunicorn.conf.py main:app in production
+    provider.warm(Config.STARTUP_MODE)
+    app.run(debug=os.getenv("FLASK_DEBUG", "1") == "1", threaded=True)
@@ -0,0 +1,139 @@
+"""Load-test harness for the chat API.
+
+Against a running server:
+    python testing/load_test.py --url http://127.0.0.1:5000 --requests 200 --concurrency 32
+
+Throughput vs. worker count (starts gunicorn once per count, run from backend/):
+    python testing/load_test.py --workers 1,2,4,8 --requests 200 --concurrency 32
+
+Requests rotate over QUERIES x LOCATIONS, and servers started here run with the
+response caches off (unless --with-cache) so the numbers measure the pipeline
+rather than cache lookups.
+"""
+import argparse
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+QUERIES = [
+    "What climate risks threaten our {} warehouse?",
+    "How will sea-level rise and flooding affect our plant in {}?",
+    "What are the heat and drought risks for operations in {}?",
+    "Assess supply chain climate exposure for our {} distribution center."
+]
+LOCATIONS = [
+    "Chicago", "Houston", "Miami", "Phoenix", "Mumbai", "Jakarta", "Rotterdam", "Lagos",
+    "Sydney", "Shanghai", "Mexico City", "Dhaka", "New Orleans", "Cape Town", "Lima", "Manila"
+]
+
+
+def wait_until_up(url, timeout=600):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(url + "/api/ready", timeout=2).ok:
+                return True
+        except requests.exceptions.RequestException:
+            pass
+        time.sleep(1)
+    return False
+
+
+def build_queries(query=None):
+    if query:
+        return [query]
+    return [q.format(loc) for loc in LOCATIONS for q in QUERIES]
+
+
+def run_load(url, queries, total, concurrency, endpoint, offset=0):
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_maxsize=concurrency)
+    session.mount("http://", adapter)
+
+    def one(i):
+        started = time.perf_counter()
+        try:
+            query = queries[(offset + i) % len(queries)]
+            resp = session.post(url + endpoint, json={"query": query, "session_id": f"load-{offset + i}"}, timeout=600)
+            ok = resp.status_code == 200
+        except requests.exceptions.RequestException:
+            ok = False
+        return ok, time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(total)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(lat for ok, lat in results if ok)
+    errors = sum(1 for ok, _ in results if not ok)
+
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(p * len(latencies)))] if latencies else float("nan")
+
+    return {
+        "requests": total,
+        "errors": errors,
+        "seconds": elapsed,
+        "throughput": len(latencies) / elapsed if elapsed else 0.0,
+        "p50": pct(0.50),
+        "p95": pct(0.95),
+        "mean": statistics.mean(latencies) if latencies else float("nan")
+    }
+
+
+def print_row(label, r):
+    print(f"{label:>8} | {r['requests']:>6} | {r['errors']:>6} | {r['throughput']:>8.2f} req/s | "
+          f"p50 {r['p50']:>7.2f}s | p95 {r['p95']:>7.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure /api/chat throughput and latency.")
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("--endpoint", default="/api/chat")
+    parser.add_argument("--query", default=None,
+                        help="send only this query (default: rotate over the built-in query set)")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--workers", default="",
+                        help="comma-separated gunicorn worker counts to start and compare, e.g. 1,2,4")
+    parser.add_argument("--with-cache", action="store_true",
+                        help="keep the response/semantic caches on in the servers started here")
+    args = parser.parse_args()
+    queries = build_queries(args.query)
+
+    print(f"{'workers':>8} | {'reqs':>6} | {'errors':>6} | {'throughput':>14} | {'latency':>11} |")
+    if not args.workers:
+        print_row("external", run_load(args.url, queries, args.requests, args.concurrency, args.endpoint))
+        return
+
+    port = args.url.rsplit(":", 1)[-1]
+    for count in [int(w) for w in args.workers.split(",") if w]:
+        env = dict(os.environ, WEB_WORKERS=str(count), BIND=f"127.0.0.1:{port}")
+        if not args.with_cache:
+            env.update(RESPONSE_CACHE_SIZE="0", SEMANTIC_CACHE_LOCATIONS="0")
+        server = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "main:app"],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            if not wait_until_up(args.url):
+                print(f"{count:>8} | server did not start")
+                continue
+            # Warm every worker before measuring, with queries the measured run starts after
+            run_load(args.url, queries, count * 2, count, args.endpoint)
+            print_row(str(count), run_load(args.url, queries, args.requests, args.concurrency,
+                                           args.endpoint, offset=count * 2))
+        finally:
+            server.send_signal(signal.SIGTERM)
+            server.wait(timeout=60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import numpy as np
+from langchain_community.vectorstores import Chroma
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from app.tools.numpy_index import META_NAME, RESCORE_NAME, SCALES_NAME, VECTORS_NAME, NumpyIndex, quantize_int8
+from export_numpy_index import iter_chroma_rows
+
+# Same shapes of query the agents send, filled in per location with --locations
+QUERY_TEMPLATES = [
+    "climate change impacts {} temperature precipitation extreme weather",
+    "sea level rise flooding {} coastal risks",
+    "drought water scarcity {} agriculture",
+    "extreme heat heatwave {} infrastructure",
+    "supply chain risk climate business continuity {}",
+    "operational resilience climate adaptation {}",
+    "financial impact climate change business {}",
+    "risk management climate hazards enterprise {}"
+]
+
+def dir_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for filename in files:
+            total += os.path.getsize(os.path.join(root, filename))
+    return total
+
+def load_store(chroma_dir):
+    ids, blocks = [], []
+    for page in iter_chroma_rows(chroma_dir):
+        ids.extend(page["ids"])
+        blocks.append(np.asarray(page["embeddings"], dtype=np.float32))
+    vectors = np.vstack(blocks)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return ids, vectors
+
+def make_queries(vectors, count, locations, seed):
+    if locations:
+        from langchain_community.embeddings import SentenceTransformerEmbeddings
+        embeddings = SentenceTransformerEmbeddings(model_name="all-MiniLM-L6-v2")
+        texts = [t.format(loc) for loc in locations for t in QUERY_TEMPLATES]
+        return np.asarray(embeddings.embed_documents(texts), dtype=np.float32), f"{len(texts)} template queries"
+    # Perturbed copies of stored chunks: realistic neighbourhoods without the model
+    rng = np.random.default_rng(seed)
+    picks = vectors[rng.choice(len(vectors), size=min(count, len(vectors)), replace=False)]
+    queries = picks + rng.normal(0, 0.05, picks.shape).astype(np.float32)
+    return queries, f"{len(queries)} perturbed stored vectors"
+
+def write_variant(root, name, vectors, dtype, rescore):
+    path = os.path.join(root, name)
+    os.makedirs(path)
+    if dtype == "int8":
+        quantized, scales = quantize_int8(vectors)
+        np.save(os.path.join(path, VECTORS_NAME), quantized)
+        np.save(os.path.join(path, SCALES_NAME), scales)
+    else:
+        np.save(os.path.join(path, VECTORS_NAME), vectors.astype(dtype))
+    if rescore:
+        np.save(os.path.join(path, RESCORE_NAME), vectors)
+    count = len(vectors)
+    with open(os.path.join(path, META_NAME), "w", encoding="utf-8") as f:
+        json.dump({"ids": [str(i) for i in range(count)], "documents": [""] * count,
+                   "metadatas": [{}] * count}, f)
+    return path
+
+def recall(found, truth):
+    k = truth.shape[1]
+    return float(np.mean([len(set(f[:k]) & set(t)) / k for f, t in zip(found, truth)]))
+
+def timed(fn, repeats):
+    fn()
+    started = time.perf_counter()
+    for _ in range(repeats):
+        result = fn()
+    return result, (time.perf_counter() - started) / repeats * 1000
+
+def run(chroma_dir, k, count, locations, rescore_factor, batch, repeats, seed):
+    print(f"Loading {chroma_dir}...")
+    ids, vectors = load_store(chroma_dir)
+    queries, kind = make_queries(vectors, count, locations, seed)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    print(f"{len(vectors)} vectors x {vectors.shape[1]} dims, {kind}, recall@{k}, "
+          f"batches of {batch} queries\n")
+
+    truth = np.argsort(-(queries @ vectors.T), axis=1)[:, :k]
+    batches = [queries[i:i + batch] for i in range(0, len(queries), batch)]
+    rows = []
+
+    # The current store: Chroma's HNSW index over float32 vectors
+    collection = Chroma(persist_directory=chroma_dir)._collection
+    position = {chunk_id: i for i, chunk_id in enumerate(ids)}
+    def chroma_search():
+        found = []
+        for q in batches:
+            raw = collection.query(query_embeddings=q.tolist(), n_results=k, include=[])
+            found.extend([position[i] for i in r] for r in raw["ids"])
+        return found
+    found, ms = timed(chroma_search, repeats)
+    rows.append(("chroma (hnsw, float32)", dir_size(chroma_dir), None, recall(found, truth), ms))
+
+    root = tempfile.mkdtemp(prefix="quant-bench-")
+    try:
+        for name, dtype, rescore in [("float32", "float32", False), ("float16", "float16", False),
+                                     ("float16 + rescore", "float16", True), ("int8", "int8", False),
+                                     ("int8 + rescore", "int8", True)]:
+            path = write_variant(root, name.replace(" + ", "_"), vectors, dtype, rescore)
+            index = NumpyIndex(path, rescore_factor=rescore_factor)
+            def numpy_search():
+                return [r for q in batches for r in index.search(q, k)[0]]
+            found, ms = timed(numpy_search, repeats)
+            rows.append((f"numpy {name}", dir_size(path) - os.path.getsize(os.path.join(path, META_NAME)),
+                         index.nbytes, recall(found, truth), ms))
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    print(f"{'index':<26}{'disk MB':>10}{'scanned MB':>12}{'recall':>9}{'ms/run':>10}")
+    for name, disk, scanned, rec, ms in rows:
+        scanned_mb = f"{scanned / (1 << 20):.1f}" if scanned is not None else "-"
+        print(f"{name:<26}{disk / (1 << 20):>10.1f}{scanned_mb:>12}{rec:>9.4f}{ms:>10.1f}")
+    print("\ndisk MB excludes chunk texts/metadata for the NumPy variants; "
+          "'+ rescore' adds the float32 copy on disk, but only candidate rows of it are read.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recall vs. memory of quantized NumPy indexes against the Chroma store.")
+    parser.add_argument("--chroma", default="climate_chroma_db", help="Chroma store to benchmark")
+    parser.add_argument("--k", type=int, default=8, help="neighbours per query (the agents use 8)")
+    parser.add_argument("--queries", type=int, default=400, help="sampled queries when --locations is not given")
+    parser.add_argument("--locations", nargs="*", default=None,
+                        help="embed the agents' query templates for these locations (loads MiniLM)")
+    parser.add_argument("--rescore-factor", type=int, default=4, help="candidates rescored per result")
+    parser.add_argument("--batch", type=int, default=8, help="queries per search call (one chat turn sends 8)")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    run(args.chroma, args.k, args.queries, args.locations, args.rescore_factor, args.batch, args.repeats, args.seed)
@@ -1,5 +1,14 @@
 import os
+import json
+import hashlib
+import time
+import queue
+import bisect
+import argparse
+import threading
+import multiprocessing
 import fitz
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from functools import partial
 from langchain_community.vectorstores import Chroma
 from langchain_community.embeddings import SentenceTransformerEmbeddings
@@ -10,7 +19,6 @@ from dotenv import load_dotenv
 
 load_dotenv()
 HUGGINGFACE_TOKEN = os.getenv("HUGGINGFACE_HUB_TOKEN")
-login(HUGGINGFACE_TOKEN)
 
 CONFIGS = {
     "climate": {
@@ -25,6 +33,46 @@ CONFIGS = {
     }
 }
 
+# Records the content hash and chunk ids of every ingested file, per Chroma dir
+# (per corpus in the unified store, as ingest_manifest.<corpus>.json)
+MANIFEST_NAME = "ingest_manifest.json"
+# Both corpora in one store, each chunk tagged with {"corpus": <pipeline name>}
+UNIFIED_CHROMA_DIR = "unified_chroma_db"
+# Chunks per embedding/write batch and batches buffered between pipeline stages
+EMBED_BATCH_SIZE = 64
+QUEUE_DEPTH = 4
+# Page-range size handed to each PDF extraction worker
+PAGES_PER_TASK = 25
+# Page-range tasks kept in flight per extraction worker; bounds the extracted
+# text held in memory while the consumer (chunking/embedding) catches up
+TASKS_PER_WORKER = 2
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def manifest_path(chroma_dir, corpus=None):
+    name = MANIFEST_NAME if corpus is None else f"ingest_manifest.{corpus}.json"
+    return os.path.join(chroma_dir, name)
+
+def load_manifest(chroma_dir, corpus=None):
+    path = manifest_path(chroma_dir, corpus)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_manifest(chroma_dir, manifest, corpus=None):
+    os.makedirs(chroma_dir, exist_ok=True)
+    path = manifest_path(chroma_dir, corpus)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
 def pdf_to_text(pdf_path, output_dir):
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
@@ -37,16 +85,125 @@ def pdf_to_text(pdf_path, output_dir):
     print(f"Extracted: {output_path}")
     return output_path
 
-def convert_all_pdfs(pdf_dir, text_dir):
-    print(f"Converting PDFs from {pdf_dir} to text...")
-    count = 0
-    for filename in os.listdir(pdf_dir):
+def extract_page_range(pdf_path, start, stop):
+    # Runs in a worker process; returns the text of each page in [start, stop)
+    doc = fitz.open(pdf_path)
+    try:
+        return [doc[i].get_text() for i in range(start, stop)]
+    finally:
+        doc.close()
+
+def plan_pdf_conversions(pdf_dir, text_dir, pdf_hashes=None, require_text=True):
+    # PDFs whose hash is unchanged (and, with require_text, whose text file still
+    # exists) are skipped; returns the pending PDFs and the unchanged filenames
+    pending = {}
+    unchanged = []
+    for filename in sorted(os.listdir(pdf_dir)):
         if filename.lower().endswith(".pdf"):
             pdf_path = os.path.join(pdf_dir, filename)
-            print(f"Found PDF: {pdf_path}")
-            pdf_to_text(pdf_path, text_dir)
-            count += 1
-    print(f"Converted {count} PDFs from {pdf_dir}.")
+            sha = None
+            if pdf_hashes is not None:
+                sha = file_sha256(pdf_path)
+                text_path = os.path.join(text_dir, filename.replace(".pdf", ".txt"))
+                if pdf_hashes.get(filename) == sha and (not require_text or os.path.exists(text_path)):
+                    unchanged.append(filename)
+                    continue
+            pending[filename] = {"path": pdf_path, "sha": sha}
+    if pdf_hashes is not None:
+        for filename in [f for f in pdf_hashes if not os.path.exists(os.path.join(pdf_dir, f))]:
+            del pdf_hashes[filename]
+    return pending, unchanged
+
+def iter_convert_pdfs(pending, text_dir=None, pdf_hashes=None, workers=None, pages_per_task=PAGES_PER_TASK):
+    # Extraction is split into page ranges spread over a process pool, at most
+    # TASKS_PER_WORKER ranges per worker in flight. Yields one event per PDF, with
+    # its per-page text, as soon as it is done (or fails) so later stages can
+    # start on it while the rest are still being parsed. The .txt copy is only
+    # written when text_dir is given; pdf_hashes is updated in place
+    if text_dir:
+        os.makedirs(text_dir, exist_ok=True)
+    tasks = []
+    for filename, info in pending.items():
+        try:
+            with fitz.open(info["path"]) as doc:
+                page_count = doc.page_count
+        except Exception as e:
+            yield {"file": filename, "error": str(e)}
+            continue
+        info.update(parts={}, total=max(1, -(-page_count // pages_per_task)), pages=page_count)
+        for start in range(0, max(page_count, 1), pages_per_task):
+            tasks.append((filename, start, min(start + pages_per_task, page_count)))
+    if not tasks:
+        return
+
+    max_workers = workers or os.cpu_count()
+    window = max_workers * TASKS_PER_WORKER
+    # The pool is started from the producer thread while the embedder thread runs
+    # model inference; forking a multi-threaded process can deadlock, so workers
+    # come from a forkserver (spawn where that is unavailable) instead
+    start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context(start_method)) as pool:
+        futures = {}
+        next_task = 0
+        while futures or next_task < len(tasks):
+            # Sliding window: new ranges are only submitted as earlier ones are
+            # consumed, and this generator is suspended while a PDF is embedded
+            while next_task < len(tasks) and len(futures) < window:
+                filename, start, stop = tasks[next_task]
+                next_task += 1
+                info = pending[filename]
+                if not info.get("error"):
+                    # Timed from its first submitted range, not from planning, so a
+                    # file's seconds exclude the time it sat behind earlier files
+                    info.setdefault("started", time.perf_counter())
+                    futures[pool.submit(extract_page_range, info["path"], start, stop)] = (filename, start)
+            if not futures:
+                break
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in sorted(done, key=lambda f: futures[f][1]):
+                filename, start = futures.pop(future)
+                info = pending[filename]
+                if info.get("error"):
+                    continue
+                try:
+                    info["parts"][start] = future.result()
+                except Exception as e:
+                    info["error"] = str(e)
+                    yield {"file": filename, "error": str(e)}
+                    continue
+                if len(info["parts"]) < info["total"]:
+                    continue
+                page_texts = [text for k in sorted(info["parts"]) for text in info["parts"][k]]
+                info["parts"] = None
+                event = {"file": filename, "path": info["path"], "page_texts": page_texts,
+                         "pages": info["pages"], "seconds": round(time.perf_counter() - info["started"], 2)}
+                if text_dir:
+                    event["output_path"] = os.path.join(text_dir, filename.replace(".pdf", ".txt"))
+                    with open(event["output_path"], "w", encoding="utf-8") as f:
+                        f.write("".join(page_texts))
+                if pdf_hashes is not None:
+                    pdf_hashes[filename] = info["sha"]
+                yield event
+
+def log_conversion(event, done, total):
+    if "error" in event:
+        print(f"[{done}/{total}] Failed: {event['file']}: {event['error']}")
+    else:
+        print(f"[{done}/{total}] Extracted: {event.get('output_path', event['file'])} "
+              f"({event['pages']} pages, {event['seconds']:.2f}s)")
+
+def convert_all_pdfs(pdf_dir, text_dir, pdf_hashes=None, workers=None, pages_per_task=PAGES_PER_TASK):
+    # A failing PDF is reported without aborting the rest of the run
+    print(f"Converting PDFs from {pdf_dir} to text...")
+    pending, unchanged = plan_pdf_conversions(pdf_dir, text_dir, pdf_hashes)
+    report = {"converted": [], "failed": [], "skipped": len(unchanged)}
+    for done, event in enumerate(iter_convert_pdfs(pending, text_dir, pdf_hashes, workers, pages_per_task), 1):
+        event.pop("page_texts", None)
+        report["failed" if "error" in event else "converted"].append(event)
+        log_conversion(event, done, len(pending))
+    print(f"Converted {len(report['converted'])} PDFs from {pdf_dir} "
+          f"({len(unchanged)} unchanged, {len(report['failed'])} failed).")
+    return report
 
 def load_documents(text_dir):
     print(f"Loading text documents from {text_dir}...")
@@ -70,15 +227,243 @@ def save_to_chroma(chunks, chroma_dir):
     vectordb.persist()
     print(f"Chroma vector store saved at: {chroma_dir}")
 
-def run_pipeline(name):
+def list_text_files(text_dir):
+    paths = []
+    for root, _, files in os.walk(text_dir):
+        for filename in files:
+            if filename.endswith(".txt"):
+                paths.append(os.path.join(root, filename))
+    return sorted(paths)
+
+def chunk_ids_for(rel_path, sha, count):
+    # Deterministic ids let a changed file's old chunks be deleted by id later
+    return [f"{rel_path}:{sha[:16]}:{i}" for i in range(count)]
+
+def split_pdf_pages(pdf_path, page_texts, splitter):
+    # Split the whole document so chunks still span page breaks, then map each
+    # chunk's character offset back to the page(s) it came from
+    page_starts = []
+    offset = 0
+    for text in page_texts:
+        page_starts.append(offset)
+        offset += len(text)
+    chunks = splitter.create_documents(["".join(page_texts)], metadatas=[{"source": pdf_path}])
+    for chunk in chunks:
+        start = max(chunk.metadata.get("start_index", 0), 0)
+        end = start + len(chunk.page_content)
+        chunk.metadata["page"] = bisect.bisect_right(page_starts, start)
+        chunk.metadata["page_end"] = bisect.bisect_right(page_starts, max(end - 1, start))
+        chunk.metadata["end_index"] = end
+    return chunks
+
+def iter_text_sources(cfg, manifest, workers=None):
+    # Text files of PDFs being (re)converted are yielded as each conversion
+    # finishes; every other text file already on disk follows
+    text_dir = cfg["text_dir"]
+    pdf_hashes = manifest.setdefault("pdfs", {})
+    pending, unchanged = plan_pdf_conversions(cfg["pdf_dir"], text_dir, pdf_hashes)
+    print(f"Converting {len(pending)} PDFs from {cfg['pdf_dir']} ({len(unchanged)} unchanged)...")
+    yielded = set()
+    for done, event in enumerate(iter_convert_pdfs(pending, text_dir, pdf_hashes, workers), 1):
+        log_conversion(event, done, len(pending))
+        if "output_path" in event:
+            yielded.add(event["output_path"])
+            yield {"key": os.path.relpath(event["output_path"], text_dir), "path": event["output_path"]}
+    for path in list_text_files(text_dir):
+        if path not in yielded:
+            yield {"key": os.path.relpath(path, text_dir), "path": path}
+
+def iter_pdf_sources(cfg, manifest, workers=None):
+    # PDFs are chunked straight from their extracted pages, keeping page numbers
+    # in the chunk metadata; text files not derived from a PDF are still indexed
+    files = manifest.setdefault("files", {})
+    known = {key[len("pdf:"):]: entry["sha256"] for key, entry in files.items() if key.startswith("pdf:")}
+    pending, unchanged = plan_pdf_conversions(cfg["pdf_dir"], cfg["text_dir"], known, require_text=False)
+    print(f"Extracting {len(pending)} PDFs from {cfg['pdf_dir']} ({len(unchanged)} unchanged)...")
+    for filename in unchanged:
+        yield {"key": f"pdf:{filename}", "unchanged": True}
+    for done, event in enumerate(iter_convert_pdfs(pending, None, None, workers), 1):
+        log_conversion(event, done, len(pending))
+        key = f"pdf:{event['file']}"
+        if "error" in event:
+            # Keep whatever was indexed for this file before rather than deleting it
+            if key in files:
+                yield {"key": key, "unchanged": True}
+            continue
+        yield {"key": key, "sha": pending[event["file"]]["sha"],
+               "path": event["path"], "page_texts": event["page_texts"]}
+
+    pdf_stems = {os.path.splitext(f)[0] for f in os.listdir(cfg["pdf_dir"]) if f.lower().endswith(".pdf")}
+    if os.path.isdir(cfg["text_dir"]):
+        for path in list_text_files(cfg["text_dir"]):
+            if os.path.splitext(os.path.basename(path))[0] not in pdf_stems:
+                yield {"key": os.path.relpath(path, cfg["text_dir"]), "path": path}
+
+def produce_batches(sources, files, out_queue, stats, corpus=None):
+    # Stage 1: hash and split changed sources, emitting fixed-size chunk batches.
+    # A batch also carries the stale ids to delete before its chunks are written
+    # and the manifest entries of sources whose last chunk it contains. In the
+    # unified store chunks are tagged with their corpus and ids are prefixed
+    # with it, so two corpora never collide.
+    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200, add_start_index=True)
+    batch = {"ids": [], "docs": [], "delete": [], "completed": {}}
+    for source in sources:
+        key = source["key"]
+        stats["seen"].add(key)
+        if source.get("unchanged"):
+            stats["unchanged"] += 1
+            continue
+        sha = source.get("sha") or file_sha256(source["path"])
+        previous = files.get(key)
+        if previous and previous["sha256"] == sha:
+            stats["unchanged"] += 1
+            continue
+        if previous:
+            batch["delete"].extend(previous["chunk_ids"])
+        stats["changed" if previous else "added"] += 1
+        if "page_texts" in source:
+            chunks = split_pdf_pages(source["path"], source["page_texts"], splitter)
+        else:
+            chunks = splitter.split_documents(TextLoader(source["path"], encoding="utf-8").load())
+        ids = chunk_ids_for(f"{corpus}:{key}" if corpus else key, sha, len(chunks))
+        if corpus:
+            for chunk in chunks:
+                chunk.metadata["corpus"] = corpus
+        print(f"Indexing: {key} ({len(chunks)} chunks)")
+        for chunk_id, chunk in zip(ids, chunks):
+            batch["ids"].append(chunk_id)
+            batch["docs"].append(chunk)
+            if len(batch["ids"]) == EMBED_BATCH_SIZE:
+                out_queue.put(batch)
+                batch = {"ids": [], "docs": [], "delete": [], "completed": {}}
+        batch["completed"][key] = {"sha256": sha, "chunk_ids": ids}
+    out_queue.put(batch)
+
+def embed_batches(embeddings, in_queue, out_queue):
+    # Stage 2: one embedding call per batch, overlapping with stage 1's parsing
+    while True:
+        batch = in_queue.get()
+        if batch is None:
+            return
+        texts = [doc.page_content for doc in batch["docs"]]
+        batch["vectors"] = embeddings.embed_documents(texts) if texts else []
+        out_queue.put(batch)
+
+def run_stage(target, args, failures, next_queue):
+    # Each stage pushes a None sentinel downstream when it ends, even on failure,
+    # so the writer never blocks forever; errors are re-raised on the main thread
+    try:
+        target(*args)
+    except BaseException as e:
+        failures.append(e)
+    finally:
+        next_queue.put(None)
+
+def sync_to_chroma(text_dir, chroma_dir, manifest, sources=None, corpus=None):
+    # Streams extract -> split -> embed -> write through bounded queues so peak
+    # memory depends on the batch size rather than the corpus size. Only new or
+    # changed files are embedded and chunks of removed files are deleted.
+    embeddings = SentenceTransformerEmbeddings(model_name="all-MiniLM-L6-v2")
+    vectordb = Chroma(persist_directory=chroma_dir, embedding_function=embeddings)
+    files = manifest.setdefault("files", {})
+    if sources is None:
+        sources = ({"key": os.path.relpath(p, text_dir), "path": p} for p in list_text_files(text_dir))
+
+    stats = {"seen": set(), "added": 0, "changed": 0, "unchanged": 0}
+    chunk_queue = queue.Queue(maxsize=QUEUE_DEPTH)
+    vector_queue = queue.Queue(maxsize=QUEUE_DEPTH)
+    failures = []
+    producer = threading.Thread(target=run_stage, daemon=True,
+                                args=(produce_batches, (sources, files, chunk_queue, stats, corpus), failures, chunk_queue))
+    embedder = threading.Thread(target=run_stage, daemon=True,
+                                args=(embed_batches, (embeddings, chunk_queue, vector_queue), failures, vector_queue))
+    producer.start()
+    embedder.start()
+
+    written = 0
+    while True:
+        batch = vector_queue.get()
+        if batch is None or failures:
+            break
+        # Stage 3: apply deletes, write vectors, then checkpoint the manifest
+        if batch["delete"]:
+            vectordb.delete(ids=batch["delete"])
+        if batch["ids"]:
+            vectordb._collection.upsert(
+                ids=batch["ids"],
+                embeddings=batch["vectors"],
+                documents=[doc.page_content for doc in batch["docs"]],
+                metadatas=[doc.metadata for doc in batch["docs"]]
+            )
+            written += len(batch["ids"])
+        if batch["completed"]:
+            files.update(batch["completed"])
+            # Copy "pdfs" first: the producer thread may still be adding hashes to it
+            save_manifest(chroma_dir, {"pdfs": dict(manifest.get("pdfs", {})), "files": files}, corpus)
+    if failures:
+        raise failures[0]
+    producer.join()
+    embedder.join()
+
+    removed = [rel for rel in files if rel not in stats["seen"]]
+    for rel in removed:
+        stale_ids = files.pop(rel)["chunk_ids"]
+        if stale_ids:
+            vectordb.delete(ids=stale_ids)
+        print(f"Removed: {rel} ({len(stale_ids)} chunks)")
+
+    vectordb.persist()
+    print(f"Sync complete: {stats['added']} added, {stats['changed']} changed, "
+          f"{len(removed)} removed, {stats['unchanged']} unchanged ({written} chunks written).")
+    return manifest
+
+def reset_chroma(chroma_dir):
+    embeddings = SentenceTransformerEmbeddings(model_name="all-MiniLM-L6-v2")
+    Chroma(persist_directory=chroma_dir, embedding_function=embeddings).delete_collection()
+
+def reset_corpus(chroma_dir, corpus):
+    # Drops one corpus from the unified store, leaving the others in place
+    embeddings = SentenceTransformerEmbeddings(model_name="all-MiniLM-L6-v2")
+    Chroma(persist_directory=chroma_dir, embedding_function=embeddings)._collection.delete(where={"corpus": corpus})
+
+def run_pipeline(name, incremental=True, workers=None, text_cache=False, unified=False):
     cfg = CONFIGS[name]
-    convert_all_pdfs(cfg["pdf_dir"], cfg["text_dir"])
-    documents = load_documents(cfg["text_dir"])
-    chunks = split_documents(documents)
-    save_to_chroma(chunks, cfg["chroma_dir"])
+    chroma_dir = UNIFIED_CHROMA_DIR if unified else cfg["chroma_dir"]
+    corpus = name if unified else None
+    manifest = load_manifest(chroma_dir, corpus) if incremental else None
+    if manifest is None:
+        # No manifest means the store's chunks have no known ids; rebuild from scratch
+        # so the first incremental run cannot duplicate them
+        if os.path.exists(chroma_dir):
+            print(f"Rebuilding {name} in {chroma_dir} from scratch...")
+            if unified:
+                reset_corpus(chroma_dir, corpus)
+            else:
+                reset_chroma(chroma_dir)
+        manifest = {"pdfs": {}, "files": {}}
+    if text_cache:
+        sources = iter_text_sources(cfg, manifest, workers)
+    else:
+        sources = iter_pdf_sources(cfg, manifest, workers)
+    manifest = sync_to_chroma(cfg["text_dir"], chroma_dir, manifest, sources, corpus)
+    save_manifest(chroma_dir, manifest, corpus)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the climate and risk Chroma stores.")
+    parser.add_argument("--full", action="store_true",
+                        help="re-ingest every file instead of only new or changed ones")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="PDF extraction processes (default: one per CPU)")
+    parser.add_argument("--text-cache", action="store_true",
+                        help="round-trip PDFs through .txt files (no page metadata)")
+    parser.add_argument("--unified", action="store_true",
+                        help=f"write both corpora into {UNIFIED_CHROMA_DIR}, tagged by corpus")
+    args = parser.parse_args()
+    # Only here: extraction workers import this module and must not log in again
+    login(HUGGINGFACE_TOKEN)
     print("Running Climate Pipeline...")
-    run_pipeline("climate")
+    run_pipeline("climate", incremental=not args.full, workers=args.workers,
+                 text_cache=args.text_cache, unified=args.unified)
     print("Running Business Risk Pipeline...")
-    run_pipeline("risk")
+    run_pipeline("risk", incremental=not args.full, workers=args.workers,
+                 text_cache=args.text_cache, unified=args.unified)
@@ -0,0 +1,134 @@
+import os
+import sys
+import json
+import argparse
+import numpy as np
+from langchain_community.vectorstores import Chroma
+
+# The on-disk layout and quantizer are shared with the serving code
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from app.tools.numpy_index import META_NAME, RESCORE_NAME, SCALES_NAME, VECTORS_NAME, quantize_int8
+
+# Stores built by embeddings.py, by corpus name
+CHROMA_DIRS = {
+    "climate": "climate_chroma_db",
+    "risk": "risk_chroma_db"
+}
+UNIFIED_CHROMA_DIR = "unified_chroma_db"
+
+# Layout read by app/tools/numpy_index.py: <out_dir>/vectors.npy + meta.json,
+# plus scales.npy for int8 and vectors_f32.npy when rescoring is enabled
+NUMPY_INDEX_DIR = "numpy_index"
+# Rows fetched from Chroma per get() call
+PAGE_SIZE = 5000
+
+def iter_chroma_rows(chroma_dir, page_size=PAGE_SIZE):
+    # Pages through every stored chunk without loading the embedding model
+    collection = Chroma(persist_directory=chroma_dir)._collection
+    total = collection.count()
+    for offset in range(0, total, page_size):
+        page = collection.get(include=["embeddings", "documents", "metadatas"],
+                              limit=page_size, offset=offset)
+        yield page
+
+def count_rows(chroma_dir):
+    return Chroma(persist_directory=chroma_dir)._collection.count()
+
+def export_index(sources, out_dir, dtype="float32", rescore=False):
+    # sources: [(chroma_dir, corpus or None)]. Vectors are unit-normalized and
+    # written straight into memory-mapped .npy files, so peak memory is one page
+    # of rows plus the metadata. int8 rows are quantized with a per-row scale;
+    # rescore also keeps a float32 copy for exact reordering of the candidates.
+    # All files are swapped in atomically, meta.json last, so running workers
+    # keep their old mapping until they reopen.
+    os.makedirs(out_dir, exist_ok=True)
+    total = sum(count_rows(chroma_dir) for chroma_dir, _ in sources)
+    if total == 0:
+        print(f"Nothing to export into {out_dir}")
+        return
+    names = [VECTORS_NAME]
+    if dtype == "int8":
+        names.append(SCALES_NAME)
+    if rescore and dtype != "float32":
+        names.append(RESCORE_NAME)
+    tmp = {name: os.path.join(out_dir, name + ".tmp.npy") for name in names}
+    arrays = {}
+    meta = {"ids": [], "documents": [], "metadatas": []}
+    row = 0
+    for chroma_dir, corpus in sources:
+        print(f"Exporting {chroma_dir}{f' as {corpus}' if corpus else ''}...")
+        for page in iter_chroma_rows(chroma_dir):
+            block = np.asarray(page["embeddings"], dtype=np.float32)[:total - row]
+            if block.size == 0:
+                continue
+            if not arrays:
+                dim = block.shape[1]
+                arrays[VECTORS_NAME] = np.lib.format.open_memmap(
+                    tmp[VECTORS_NAME], mode="w+", dtype=dtype, shape=(total, dim))
+                if SCALES_NAME in tmp:
+                    arrays[SCALES_NAME] = np.lib.format.open_memmap(
+                        tmp[SCALES_NAME], mode="w+", dtype=np.float32, shape=(total,))
+                if RESCORE_NAME in tmp:
+                    arrays[RESCORE_NAME] = np.lib.format.open_memmap(
+                        tmp[RESCORE_NAME], mode="w+", dtype=np.float32, shape=(total, dim))
+            norms = np.linalg.norm(block, axis=1, keepdims=True)
+            block = block / np.where(norms == 0, 1.0, norms)
+            rows = len(block)
+            if dtype == "int8":
+                quantized, scales = quantize_int8(block)
+                arrays[VECTORS_NAME][row:row + rows] = quantized
+                arrays[SCALES_NAME][row:row + rows] = scales
+            else:
+                arrays[VECTORS_NAME][row:row + rows] = block
+            if RESCORE_NAME in arrays:
+                arrays[RESCORE_NAME][row:row + rows] = block
+            for chunk_id, text, metadata in zip(page["ids"][:rows], page["documents"][:rows],
+                                                page["metadatas"][:rows]):
+                metadata = dict(metadata or {})
+                if corpus:
+                    metadata.setdefault("corpus", corpus)
+                meta["ids"].append(chunk_id)
+                meta["documents"].append(text)
+                meta["metadatas"].append(metadata)
+            row += rows
+    if not arrays:
+        print(f"Nothing to export into {out_dir}")
+        return
+    for name, array in arrays.items():
+        array.flush()
+    arrays.clear()
+    if row < total:
+        # The store shrank while exporting; drop the unused tail rows
+        for path in tmp.values():
+            np.save(path, np.load(path)[:row])
+    for name, path in tmp.items():
+        os.replace(path, os.path.join(out_dir, name))
+    if RESCORE_NAME not in tmp and os.path.exists(os.path.join(out_dir, RESCORE_NAME)):
+        os.remove(os.path.join(out_dir, RESCORE_NAME))
+    meta_path = os.path.join(out_dir, META_NAME)
+    with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(meta_path + ".tmp", meta_path)
+    size_mb = sum(os.path.getsize(os.path.join(out_dir, name)) for name in names if name != RESCORE_NAME) / (1 << 20)
+    print(f"Exported {row} vectors ({dtype}, {size_mb:.1f} MB searched"
+          f"{', float32 rescoring copy' if RESCORE_NAME in tmp else ''}) to {out_dir}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the Chroma stores to memory-mapped NumPy indexes.")
+    parser.add_argument("--dtype", choices=["float32", "float16", "int8"], default="float32",
+                        help="storage type of the searched matrix (float16: 1/2 size, int8: ~1/4)")
+    parser.add_argument("--rescore", action="store_true",
+                        help="also write a float32 copy used to rescore float16/int8 candidates exactly")
+    parser.add_argument("--unified", action="store_true",
+                        help=f"write one index with corpus metadata to {NUMPY_INDEX_DIR}/unified")
+    parser.add_argument("--out", default=NUMPY_INDEX_DIR, help="output directory")
+    args = parser.parse_args()
+    if args.unified:
+        if os.path.isdir(UNIFIED_CHROMA_DIR):
+            sources = [(UNIFIED_CHROMA_DIR, None)]
+        else:
+            sources = [(chroma_dir, corpus) for corpus, chroma_dir in CHROMA_DIRS.items()]
+        export_index(sources, os.path.join(args.out, "unified"), args.dtype, args.rescore)
+    else:
+        for corpus, chroma_dir in CHROMA_DIRS.items():
+            export_index([(chroma_dir, None)], os.path.join(args.out, corpus), args.dtype, args.rescore)
@@ -2,11 +2,28 @@ import React, { useState, useEffect } from "react";
 import axios from "axios";
 import AgentResponse from "./AgentResponse";
 
+// crypto.randomUUID only exists in secure contexts (HTTPS or localhost); the
+// app opened over plain HTTP on a LAN address falls back to getRandomValues
+const newSessionId = () => {
+  if (typeof crypto !== "undefined" && crypto.randomUUID) {
+    return crypto.randomUUID();
+  }
+  const bytes = new Uint8Array(16);
+  if (typeof crypto !== "undefined" && crypto.getRandomValues) {
+    crypto.getRandomValues(bytes);
+  } else {
+    for (let i = 0; i < bytes.length; i++) bytes[i] = Math.floor(Math.random() * 256);
+  }
+  return Array.from(bytes, (b) => b.toString(16).padStart(2, "0")).join("");
+};
+
 const CenterCard = ({ locationAddress }) => {
   const [input, setInput] = useState("");
   const [messages, setMessages] = useState([]);
   const [loading, setLoading] = useState(false);
   const [selectedAddress, setSelectedAddress] = useState("");
+  // One backend conversation per page load
+  const [sessionId] = useState(newSessionId);
 
   // Whenever the parent passes a new locationAddress, update selectedAddress
   useEffect(() => {
@@ -48,7 +65,8 @@ const CenterCard = ({ locationAddress }) => {
     try {
       // Send the formatted message (with location) to backend
       const res = await axios.post("http://127.0.0.1:5000/api/chat", { 
-        query: userMessage 
+        query: userMessage,
+        session_id: sessionId,
       });
       console.log(res.data);
       